@@ -0,0 +1,114 @@
+"""
+Micro-benchmark of TTS text normalization on large story texts.
+
+Compares the single-pass `Normalizer` against the old approach (one
+case-insensitive `re.sub` per dictionary entry) across story lengths and
+word-table sizes. Extra word rules are synthetic, so the tables grow without
+changing what the stories contain.
+
+    cd backend
+    python -m bench.normalize_bench
+    python -m bench.normalize_bench --words 1000,20000 --rules 0,500 --out normalize.json
+"""
+
+import argparse
+import json
+import platform
+import re
+import statistics
+import sys
+import time
+import timeit
+
+from bench.pipeline_bench import _csv, _git_revision, make_story
+from services.normalize import DEFAULT_RULES, Normalizer
+
+_REDDITISMS = "AITA? My MIL (58F) told my SO (29 M) NTA. TL;DR: **YTA** tbh, see r/AmItheAsshole https://redd.it/x"
+
+
+def make_text(words: int, seed: int = 0) -> str:
+    """Filler story with a Reddit-style sentence every ~100 words so the rules have something to do."""
+    paragraphs = make_story(words, seed).split("\n\n")
+    return "\n\n".join(f"{p} {_REDDITISMS}" for p in paragraphs)
+
+
+def pack_with(extra_rules: int) -> dict:
+    words = dict(DEFAULT_RULES["words"])
+    words.update({f"XQ{i}": f"expansion {i}" for i in range(extra_rules)})
+    return {**DEFAULT_RULES, "words": words}
+
+
+def legacy(words: dict[str, str]):
+    """The previous implementation, generalised to a word table: recompiles and rescans per entry."""
+    table = {rf"\b{re.escape(k)}\b": v for k, v in words.items()}
+
+    def expand(text: str) -> str:
+        for pattern, replacement in table.items():
+            text = re.sub(pattern, replacement, text, flags=re.IGNORECASE)
+        return text
+
+    return expand
+
+
+def measure(fn, text: str, repeat: int) -> dict:
+    fn(text)   # warm re's compile cache, as a long-running server would have
+    number = max(1, int(0.2 / max(1e-6, timeit.timeit(lambda: fn(text), number=1))))
+    runs   = [t / number * 1000 for t in timeit.repeat(lambda: fn(text), number=number, repeat=repeat)]
+    return {"best_ms": round(min(runs), 3), "median_ms": round(statistics.median(runs), 3)}
+
+
+def run(words_list: list[int], rules_list: list[int], repeat: int) -> list[dict]:
+    out = []
+    for extra in rules_list:
+        pack = pack_with(extra)
+        started = time.perf_counter()
+        engine  = Normalizer([pack])
+        build   = (time.perf_counter() - started) * 1000
+        old     = legacy(pack["words"])
+        for words in words_list:
+            text = make_text(words)
+            print(f"· {len(pack['words']):>5} word rules  {words:>6} words", file=sys.stderr)
+            compiled = measure(engine.normalize, text, repeat)
+            previous = measure(old, text, repeat)
+            out.append({
+                "word_rules":   len(pack["words"]),
+                "story_words":  words,
+                "text_chars":   len(text),
+                "build_ms":     round(build, 3),
+                "compiled":     compiled,
+                "per_rule_sub": previous,
+                "speedup":      round(previous["best_ms"] / compiled["best_ms"], 2),
+            })
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--words", type=lambda v: _csv(v, int), default=[1000, 10000, 50000],
+                        help="story lengths to sweep, comma-separated")
+    parser.add_argument("--rules", type=lambda v: _csv(v, int), default=[0, 200, 1000],
+                        help="synthetic word rules added to the built-in pack, comma-separated")
+    parser.add_argument("--repeat", type=int, default=5, help="timing repeats per measurement")
+    parser.add_argument("--out", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    report = {
+        "meta": {
+            "revision":  _git_revision(),
+            "python":    platform.python_version(),
+            "platform":  platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "params":    {"words": args.words, "rules": args.rules, "repeat": args.repeat},
+        },
+        "results": run(args.words, args.rules, args.repeat),
+    }
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,322 @@
+"""
+End-to-end benchmark of the generation pipeline, fully offline.
+
+Runs the real `run_generation` (download → narration → composite) against a
+stand-in TTS and a local HTTP server holding synthetic background clips, over
+a sweep of story lengths, concurrency levels and clip types. Each
+configuration starts from empty caches and writes into a scratch directory.
+
+    cd backend
+    python -m bench.pipeline_bench --out bench.json
+    python -m bench.pipeline_bench --words 150,1500 --concurrency 1,4 --clips portrait-720p
+    python -m bench.pipeline_bench --tts espeak      # the offline engine instead of the stand-in
+
+The report is JSON (sorted keys) so two runs can be diffed directly: per-stage
+latency percentiles, renders/min, peak RSS of the process and its ffmpeg
+children, and bytes written to disk.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+from bench.standins import CLIP_TYPES, StandInTTS, make_clip, serve_directory
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_WORDS = (
+    "so my roommate decided that the fridge was a shared space even though we had agreed on "
+    "separate shelves and one night I came home to find my leftovers gone and a note that said "
+    "thanks I was starving which honestly made it worse because I had been looking forward to it"
+).split()
+
+
+def make_story(words: int, seed: int) -> str:
+    """Deterministic filler story with paragraph breaks; `seed` keeps texts distinct between jobs."""
+    rng, out = random.Random(seed), []
+    for i in range(words):
+        out.append(rng.choice(_WORDS))
+        if i % 18 == 17:
+            out[-1] += "."
+        if i % 120 == 119:
+            out[-1] += "\n\n"
+    return f"Story {seed}. " + " ".join(out)
+
+
+def percentiles(values: list[float]) -> dict | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+
+    def rank(p: float) -> float:
+        return round(ordered[min(len(ordered) - 1, max(0, int(round(p / 100 * len(ordered))) - 1))], 3)
+
+    return {
+        "p50":  rank(50),
+        "p90":  rank(90),
+        "p99":  rank(99),
+        "max":  round(ordered[-1], 3),
+        "mean": round(sum(ordered) / len(ordered), 3),
+    }
+
+
+def _rss_kb(pid: str) -> int:
+    try:
+        with open(f"/proc/{pid}/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def _children(pid: str) -> list[str]:
+    out = []
+    try:
+        for tid in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{tid}/children", "r") as f:
+                out += f.read().split()
+    except OSError:
+        pass
+    return out
+
+
+class PeakRss(threading.Thread):
+    """Samples RSS of this process plus its child processes (ffmpeg) and keeps the peak. Linux only."""
+
+    def __init__(self, interval: float = 0.05):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak_kb  = 0
+        self._done    = threading.Event()
+
+    def run(self):
+        me = str(os.getpid())
+        while not self._done.is_set():
+            total = _rss_kb(me) + sum(_rss_kb(c) for c in _children(me))
+            self.peak_kb = max(self.peak_kb, total)
+            self._done.wait(self.interval)
+
+    def stop(self) -> float:
+        self._done.set()
+        self.join()
+        return round(self.peak_kb / 1024, 1)
+
+
+def tree_bytes(*roots: str) -> int:
+    total = 0
+    for root in roots:
+        for dirpath, _dirs, files in os.walk(root):
+            for name in files:
+                try:
+                    total += os.path.getsize(os.path.join(dirpath, name))
+                except OSError:
+                    pass
+    return total
+
+
+def reset_state(mods):
+    """Empty every cache and output folder so each configuration starts cold."""
+    for root in ("output", mods.asset_cache.ASSET_CACHE_DIR, mods.tts_cache.TTS_CACHE_DIR,
+                 mods.renditions.RENDITIONS_DIR):
+        shutil.rmtree(root, ignore_errors=True)
+        os.makedirs(root, exist_ok=True)
+
+
+async def run_config(mods, base_url: str, words: int, concurrency: int, clip: str, renders: int) -> dict:
+    reset_state(mods)
+    video = {"id": f"bench-{clip}", "name": clip, "url": f"{base_url}/{clip}.mp4"}
+    limit = asyncio.Semaphore(concurrency)
+
+    async def one(i: int) -> tuple[dict, float]:
+        async with limit:
+            job_id = f"bench-{uuid.uuid4().hex[:8]}"
+            story  = {"text": make_story(words, seed=i)}
+            mods.job_store.create(job_id, {"story": story, "video": video})
+            started = time.perf_counter()
+            await mods.generate.run_generation(job_id, story, video, "male")
+            elapsed = time.perf_counter() - started
+            job = mods.job_store.get(job_id)
+            mods.job_store.delete(job_id)
+            return job, elapsed
+
+    rss     = PeakRss()
+    rss.start()
+    started = time.perf_counter()
+    results = await asyncio.gather(*(one(i) for i in range(renders)))
+    wall    = time.perf_counter() - started
+    peak    = rss.stop()
+
+    # Renditions ingested in the background belong to this configuration too
+    await asyncio.gather(*list(mods.renditions._inflight.values()), return_exceptions=True)
+
+    ok     = [(job, t) for job, t in results if job and job["status"] == "done"]
+    errors = [job["error"] if job else "job vanished" for job, _ in results if not job or job["status"] != "done"]
+    stages = {}
+    for job, _ in ok:
+        for name, state in (job.get("stages") or {}).items():
+            if "seconds" in state:
+                stages.setdefault(name, []).append(state["seconds"])
+
+    return {
+        "story_words":     words,
+        "concurrency":     concurrency,
+        "clip":            clip,
+        "renders":         renders,
+        "succeeded":       len(ok),
+        "errors":          sorted(set(errors)),
+        "wall_s":          round(wall, 3),
+        "renders_per_min": round(len(ok) / wall * 60, 2) if wall else None,
+        "latency_s":       percentiles([t for _, t in ok]),
+        "stage_latency_s": {name: percentiles(v) for name, v in sorted(stages.items())},
+        "peak_rss_mb":     peak,
+        "bytes_written":   tree_bytes(
+            "output", mods.asset_cache.ASSET_CACHE_DIR, mods.tts_cache.TTS_CACHE_DIR,
+            mods.renditions.RENDITIONS_DIR,
+        ),
+    }
+
+
+def _csv(value: str, cast=str) -> list:
+    return [cast(v) for v in value.split(",") if v]
+
+
+def _git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _ffmpeg_version() -> str | None:
+    try:
+        return subprocess.run(["ffmpeg", "-version"], capture_output=True, text=True).stdout.splitlines()[0]
+    except (OSError, IndexError):
+        return None
+
+
+async def main_async(args, mods, base_url: str) -> list[dict]:
+    out = []
+    for clip in args.clips:
+        for words in args.words:
+            for concurrency in args.concurrency:
+                renders = args.renders or concurrency * 2
+                print(f"· {clip:<18} {words:>5} words  ×{concurrency}  ({renders} renders)", file=sys.stderr)
+                out.append(await run_config(mods, base_url, words, concurrency, clip, renders))
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--words", type=lambda v: _csv(v, int), default=[150, 600, 1500],
+                        help="story lengths to sweep, comma-separated")
+    parser.add_argument("--concurrency", type=lambda v: _csv(v, int), default=[1, 2, 4],
+                        help="renders in flight at once, comma-separated")
+    parser.add_argument("--clips", type=_csv, default=list(CLIP_TYPES),
+                        help=f"clip types to sweep ({', '.join(CLIP_TYPES)})")
+    parser.add_argument("--renders", type=int, default=0,
+                        help="renders per configuration (default: 2 × concurrency)")
+    parser.add_argument("--clip-seconds", type=int, default=20, help="length of each synthetic background")
+    parser.add_argument("--tts-rtf", type=float, default=0.05,
+                        help="stand-in TTS latency as a fraction of the audio duration")
+    parser.add_argument("--tts", default="standin",
+                        help="'standin', or a real TTS provider to measure instead (e.g. espeak, offline)")
+    parser.add_argument("--workdir", help="scratch directory (default: a fresh temp dir, removed afterwards)")
+    parser.add_argument("--out", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    unknown = set(args.clips) - set(CLIP_TYPES)
+    if unknown:
+        parser.error(f"unknown clip types: {', '.join(sorted(unknown))}")
+    if not shutil.which("ffmpeg") or not shutil.which("ffprobe"):
+        parser.error("ffmpeg and ffprobe must be on PATH")
+
+    out_path = os.path.abspath(args.out) if args.out else None
+    workdir = os.path.abspath(args.workdir or tempfile.mkdtemp(prefix="storyscroll-bench-"))
+    clips   = os.path.join(workdir, "clips")
+    os.makedirs(clips, exist_ok=True)
+
+    # Point every store and cache into the scratch dir *before* the backend is imported
+    os.environ.update(
+        ASSET_CACHE_DIR=os.path.join(workdir, "cache", "assets"),
+        TTS_CACHE_DIR=os.path.join(workdir, "cache", "tts"),
+        RENDITIONS_DIR=os.path.join(workdir, "videos", "renditions"),
+        JOB_STORE_PATH=os.path.join(workdir, "data", "jobs.db"),
+        CATALOG_PATH=os.path.join(workdir, "data", "catalog.db"),
+        TTS_PROVIDER="elevenlabs" if args.tts == "standin" else args.tts,
+        TTS_FALLBACK="",
+    )
+    os.chdir(workdir)
+    sys.path.insert(0, BACKEND_DIR)
+
+    from types import SimpleNamespace
+    from routes import generate
+    from services import asset_cache, renditions, tts_cache, tts_providers
+    from services.job_store import job_store
+
+    standin = StandInTTS(rtf=args.tts_rtf)
+    if args.tts == "standin":
+        # Replaces the pooled ElevenLabs client, so slots, retries and caching still apply
+        tts_providers.get("elevenlabs")._make_client = lambda: standin
+    mods = SimpleNamespace(
+        generate=generate, asset_cache=asset_cache, renditions=renditions,
+        tts_cache=tts_cache, job_store=job_store,
+    )
+
+    for clip in args.clips:
+        make_clip(os.path.join(clips, f"{clip}.mp4"), clip, args.clip_seconds)
+    server, base_url = serve_directory(clips)
+
+    try:
+        results = asyncio.run(main_async(args, mods, base_url))
+    finally:
+        server.shutdown()
+        os.chdir(BACKEND_DIR)
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "revision":  _git_revision(),
+            "python":    platform.python_version(),
+            "platform":  platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "ffmpeg":    _ffmpeg_version(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "params": {
+                "words":        args.words,
+                "concurrency":  args.concurrency,
+                "clips":        args.clips,
+                "renders":      args.renders or "2 x concurrency",
+                "clip_seconds": args.clip_seconds,
+                "tts_rtf":      args.tts_rtf,
+                "tts":          args.tts,
+            },
+            "tts_calls": standin.calls if args.tts == "standin" else None,
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if out_path:
+        with open(out_path, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
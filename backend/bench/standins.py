@@ -0,0 +1,77 @@
+import functools
+import subprocess
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+# Background clip shapes the sweep can pick from: (width, height, fps)
+CLIP_TYPES = {
+    "portrait-720p":   (720, 1280, 30),    # already canonical — only the stream copy path differs
+    "landscape-1080p": (1920, 1080, 30),
+    "landscape-480p60": (854, 480, 60),
+}
+
+WORDS_PER_MINUTE = 150   # narration pace used to size the synthetic audio
+
+
+class StandInTTS:
+    """
+    Offline replacement for the slice of the ElevenLabs client the pipeline
+    uses (`client.text_to_speech.convert(...)` yielding MP3 bytes).
+
+    Audio is a quiet tone as long as the text would take to read aloud, and
+    each call sleeps `rtf` × that duration to stand in for provider latency.
+    """
+
+    def __init__(self, rtf: float = 0.05):
+        self.rtf   = rtf
+        self.calls = 0
+        self.text_to_speech = self
+        self._lock = threading.Lock()
+
+    def convert(self, voice_id: str, text: str, model_id: str, output_format: str):
+        with self._lock:
+            self.calls += 1
+        seconds = max(1.0, len(text.split()) / WORDS_PER_MINUTE * 60)
+        time.sleep(seconds * self.rtf)
+        audio = subprocess.run(
+            [
+                "ffmpeg", "-v", "error",
+                "-f", "lavfi", "-i", f"sine=frequency=220:sample_rate=44100:duration={seconds:.2f}",
+                "-af", "volume=0.2",
+                "-c:a", "libmp3lame", "-b:a", "128k",
+                "-f", "mp3", "pipe:1",
+            ],
+            capture_output=True, check=True,
+        ).stdout
+        for i in range(0, len(audio), 64 * 1024):
+            yield audio[i:i + 64 * 1024]
+
+
+def make_clip(path: str, clip_type: str, seconds: int = 20):
+    """Render a synthetic background clip (moving test pattern, H.264, no audio)."""
+    width, height, fps = CLIP_TYPES[clip_type]
+    subprocess.run(
+        [
+            "ffmpeg", "-y", "-v", "error",
+            "-f", "lavfi", "-i", f"testsrc2=size={width}x{height}:rate={fps}",
+            "-t", str(seconds),
+            "-c:v", "libx264", "-preset", "veryfast", "-pix_fmt", "yuv420p",
+            "-movflags", "+faststart",
+            path,
+        ],
+        check=True,
+    )
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_directory(directory: str) -> tuple[ThreadingHTTPServer, str]:
+    """Serve `directory` over HTTP on a free local port (Last-Modified included). Returns (server, base_url)."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(_QuietHandler, directory=directory))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+    return server, f"http://{host}:{port}"
@@ -1,14 +1,53 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from dotenv import load_dotenv
+import asyncio
 import os
 
 load_dotenv()
 
-from routes import story, reddit, videos, generate
+from routes import story, reddit, videos, generate, metrics
+from services import tts_providers
+from services.scheduler import scheduler
+from services.storage import storage, touch
 
-app = FastAPI(title="StoryScroll API", version="0.1.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Refuse an unknown TTS provider; report one that isn't installed
+    tts_providers.check_config()
+    # Normalize the background library once, in the background
+    ingest = None
+    if os.getenv("INGEST_ON_STARTUP", "1") == "1":
+        ingest = asyncio.create_task(videos.ingest_library())
+    # Probe library metadata once, off the event loop
+    warm = asyncio.create_task(videos.warm_catalog())
+    # Sweep temp files left by crashed jobs, then keep output/, uploads/, videos/ within quota
+    housekeeping = asyncio.create_task(storage.run())
+    # Start claiming queued jobs, including any left over from before a restart
+    scheduler.start()
+    yield
+    if ingest:
+        ingest.cancel()
+    warm.cancel()
+    housekeeping.cancel()
+    await scheduler.stop()
+    await reddit.close_client()
+
+
+class TrackedStaticFiles(StaticFiles):
+    """StaticFiles that marks served files as recently used, so eviction skips them."""
+
+    async def get_response(self, path: str, scope):
+        response = await super().get_response(path, scope)
+        if response.status_code in (200, 206):
+            touch(os.path.join(self.directory, path))
+        return response
+
+
+app = FastAPI(title="StoryScroll API", version="0.1.0", lifespan=lifespan)
 
 # ── CORS ─────────────────────────────────────────────────────────────────────
 app.add_middleware(
@@ -24,14 +63,15 @@ app.include_router(story.router,    prefix="/api")
 app.include_router(reddit.router,   prefix="/api")
 app.include_router(videos.router,   prefix="/api")
 app.include_router(generate.router, prefix="/api")
+app.include_router(metrics.router,  prefix="/api")
 
 # ── Serve generated videos ───────────────────────────────────────────────────
 os.makedirs("output", exist_ok=True)
-app.mount("/api/video", StaticFiles(directory="output"), name="video")
+app.mount("/api/video", TrackedStaticFiles(directory="output"), name="video")
 
 # ── Serve library video files ─────────────────────────────────────────────────
 os.makedirs("videos", exist_ok=True)
-app.mount("/api/library", StaticFiles(directory="videos"), name="library")
+app.mount("/api/library", TrackedStaticFiles(directory="videos"), name="library")
 
 
 @app.get("/api/health")
@@ -1,42 +1,78 @@
-from fastapi import APIRouter, BackgroundTasks, HTTPException
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import FileResponse, StreamingResponse
 from pydantic import BaseModel
+from typing import Literal
 import uuid
 import asyncio
+import json
 import os
-import subprocess
-import httpx
-import aiofiles
 import re
+import shutil
+import time
+
+from services import asset_cache, render_cache, renditions, tts, tts_cache
+from services.job_store import job_store
+from services.scheduler import scheduler, QueueFull
+from services.job_events import wait_for_change
+from services.pipeline import Pipeline, Stage
+from services.normalize import normalize
+from services.metrics import job_seconds, jobs_finished, queue_wait_seconds
+from services.storage import storage, shard_path, touch
+from routes.videos import probe_seconds, prefetch, trusted_id
 
 router = APIRouter()
 
-# Expand common Reddit acronyms so TTS reads them naturally
-_ACRONYM_MAP = {
-    r"\bTIFU\b": "Today I fucked up",
-    r"\bAITA\b": "Am I the asshole",
-}
-
+# Expand Reddit acronyms, age/gender tags, links and markdown so TTS reads them naturally
 def expand_acronyms(text: str) -> str:
-    for pattern, replacement in _ACRONYM_MAP.items():
-        text = re.sub(pattern, replacement, text, flags=re.IGNORECASE)
-    return text
+    return normalize(text)
 
 OUTPUT_DIR = "output"
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-# ── In-memory job tracker (replace with Redis/DB in later phases) ─────────────
-JOBS: dict[str, dict] = {}
+# Progressive output: fMP4 segments + a live playlist in output/{job_id}/.
+# 2s segments line up with the renditions' 2s GOP, so copied video cuts cleanly.
+HLS_SEGMENT_S = 2
+HLS_FILES     = re.compile(r"index\.m3u8|init\.mp4|seg_\d{5}\.m4s")
+
+# Preview tier: the opening seconds as a small, low-fps proxy that encodes in seconds
+PREVIEW_SECONDS = int(os.getenv("PREVIEW_SECONDS", "15"))
+PREVIEW_FILTER  = "scale=w=360:h=640:force_original_aspect_ratio=increase,crop=360:640,fps=15"
+
+# Opt-in: pipe uncached narration into the composite's ffmpeg as it is synthesized,
+# so encoding starts with the first audio bytes instead of after the whole story.
+# Streamed chunks are joined as-is (no silence trimming) and the story-level
+# narration isn't cached, so re-renders synthesize again from the chunk cache.
+STREAM_NARRATION = os.getenv("STREAM_NARRATION", "0") == "1"
+
+BATCH_MAX_ITEMS       = int(os.getenv("BATCH_MAX_ITEMS", "100"))
+BATCH_TTS_CONCURRENCY = int(os.getenv("BATCH_TTS_CONCURRENCY", "2"))   # narrations pre-synthesized at once
+
+# Shared-input resolution for batches (kept referenced so they aren't garbage-collected)
+_batch_tasks: set[asyncio.Task] = set()
 
+# Jobs live in services.job_store (SQLite by default) so every uvicorn worker
+# sees the same queue and a restart doesn't lose them.
 
-VOICE_IDS = {
-    "male":   "pNInz6obpgDQGcFmaJgB",  # Adam
-    "female": "21m00Tcm4TlvDq8ikWAM",  # Rachel
-}
 
 class GenerateRequest(BaseModel):
     story: dict   # { text, source, word_count, ... }
     video: dict   # { id, name, file_path, ... }
     voice: str = "male"
+    priority: int = 0   # higher runs first; FIFO within the same priority
+    output_mode: Literal["mp4", "hls"] = "mp4"   # "hls" also streams segments while encoding
+    preview:  bool = False   # render only the first PREVIEW_SECONDS at 360p; promote later
+
+
+class BatchItem(BaseModel):
+    story: dict
+    video: dict
+    voice: str = "male"
+
+
+class BatchRequest(BaseModel):
+    items:    list[BatchItem]
+    priority: int = -1   # behind interactive renders unless raised
+    output_mode: Literal["mp4", "hls"] = "mp4"
 
 
 class JobStatus(BaseModel):
@@ -46,111 +82,308 @@ class JobStatus(BaseModel):
     step:     str
     output:   str | None = None
     error:    str | None = None
+    queue_position: int | None = None
+    eta:      float | None = None   # seconds left in the composite step
+    stream:   str | None = None     # live HLS playlist URL, once the first segment is out
+    timings:  dict | None = None    # {queue_s, total_s, stages: {name: seconds}} once finished
 
 
-async def run_generation(job_id: str, story: dict, video: dict, voice: str = "male"):
-    downloaded_video = None
-    try:
-        story_text = expand_acronyms(story.get("text", ""))
-        audio_path = os.path.join(OUTPUT_DIR, f"{job_id}_audio.mp3")
-        output_path = os.path.join(OUTPUT_DIR, f"{job_id}.mp4")
-
-        # ── Resolve video source ───────────────────────────────────────────────
+async def run_generation(
+    job_id: str, story: dict, video: dict, voice: str = "male", output_mode: str = "mp4",
+    preview: bool = False, batch_id: str | None = None, promoted: bool = False,
+):
+    output_path = shard_path(OUTPUT_DIR, job_id, f"{job_id}.mp4")
+    hls_dir     = shard_path(OUTPUT_DIR, job_id)
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    held: list[tuple] = []   # (cache, path) pairs to release when the job ends
+    story_text = expand_acronyms(story.get("text", ""))
+    voice      = tts.voice_name(voice)
+    narrator   = None   # TTS provider that actually spoke it (the fallback, if the provider failed)
+
+    # ── Stage: background — cached download, then pick the canonical rendition ─
+    async def background(results, report):
         video_url = video.get("url", "")
         if video_url:
-            # Download from Cloudinary (or any remote URL) to a temp file
-            JOBS[job_id].update({"step": "Downloading background video", "status": "processing", "progress": 2})
-            downloaded_video = os.path.join(OUTPUT_DIR, f"{job_id}_bg.mp4")
-            async with httpx.AsyncClient(timeout=300.0) as client:
-                async with client.stream("GET", video_url) as resp:
-                    resp.raise_for_status()
-                    async with aiofiles.open(downloaded_video, "wb") as f:
-                        async for chunk in resp.aiter_bytes(chunk_size=1024 * 1024):
-                            await f.write(chunk)
-            video_path = downloaded_video
+            # Remote clips (R2 / Cloudinary) go through the shared on-disk cache
+            entry = await asset_cache.fetch(video_url)
+            asset_cache.cache.acquire(entry["path"])
+            held.append((asset_cache.cache, entry["path"]))
+            video_path = entry["path"]
+            version    = entry.get("version") or video_url
+            # Submitted under the URL until now: re-key so identical requests find this job
+            job_store.update(job_id, render_key=_render_key(story_text, video, voice, output_mode, preview, version))
         else:
             video_path = video.get("file_path", "")
-
-        # ── Step 1: TTS ────────────────────────────────────────────────────────
-        JOBS[job_id].update({"step": "Generating audio narration", "status": "processing", "progress": 5})
-
-        def do_tts():
-            from elevenlabs.client import ElevenLabs
-            client = ElevenLabs(api_key=os.getenv("ELEVENLABS_API_KEY"))
-            audio = client.text_to_speech.convert(
-                voice_id=VOICE_IDS.get(voice, VOICE_IDS["male"]),
-                text=story_text,
-                model_id="eleven_multilingual_v2",
-                output_format="mp3_44100_128",
-            )
-            with open(audio_path, "wb") as f:
-                for chunk in audio:
-                    if chunk:
-                        f.write(chunk)
-
-        await asyncio.to_thread(do_tts)
-        JOBS[job_id]["progress"] = 30
-
-        JOBS[job_id].update({"step": "Analyzing audio", "progress": 40})
-
-        # ── Step 3: Composite — loop video + mix TTS audio ───────────────────
-        JOBS[job_id].update({"step": "Compositing video + audio", "progress": 45})
+            version    = render_cache.asset_version(video)
+
+        # Prefer the pre-normalized 720x1280 rendition: the video track can then be
+        # stream-copied. Otherwise scale/crop this once and ingest for next time.
+        rendition = renditions.lookup(video_path)
+        if rendition:
+            return {"path": rendition, "normalized": True, "version": version}
+        if batch_id and os.path.exists(video_path):
+            # Batch renders share one transcode of the clip rather than each scaling it
+            try:
+                rendition = await renditions.ingest_async(video_path, trusted_id(video))
+                return {"path": rendition, "normalized": True, "version": version}
+            except Exception:
+                pass
+        if os.path.exists(video_path):
+            renditions.schedule(video_path, trusted_id(video))
+        return {"path": video_path, "normalized": False, "version": version}
+
+    # ── Stage: narration (cached by normalized text + voice + model + format) ──
+    async def narration(results, report):
+        nonlocal narrator
+        if preview:
+            # Only the first chunk — cached, so a promoted full render starts from it
+            entry    = await asyncio.to_thread(tts.narrate_opening, story_text, voice)
+            narrator = entry["provider"]
+            job_store.update(job_id, tts_provider=narrator)
+            tts_cache.cache.acquire(entry["path"])
+            held.append((tts_cache.cache, entry["path"]))
+            return entry["path"]
+
+        tts_key = tts.story_key(story_text, voice)
+        entry   = tts_cache.lookup(tts_key)
+        job_store.update(job_id, tts_key=tts_key, tts_cached=entry is not None)
+
+        if entry is None and STREAM_NARRATION:
+            return None   # synthesized by the composite, straight into ffmpeg
+        if entry is None:
+            # Long stories are synthesized as parallel chunks
+            def on_chunk(done: int, total: int):
+                report(done / total)
+
+            # A render promoted from a preview starts with the preview's cached opening
+            entry = await asyncio.to_thread(tts.narrate, story_text, voice, job_id, on_chunk, promoted)
+
+        narrator = entry.get("provider") or tts.primary().name
+        job_store.update(job_id, tts_provider=narrator)
+        tts_cache.cache.acquire(entry["path"])
+        held.append((tts_cache.cache, entry["path"]))
+        return entry["path"]
+
+    # ── Stage: composite — loop video + mix TTS audio ──────────────────────────
+    async def composite(results, report):
+        video_path = results["background"]["path"]
+        audio_path = results["narration"]
+        feed       = None
+
+        if preview:
+            video_args = [
+                "-vf", PREVIEW_FILTER,
+                "-c:v", "libx264", "-preset", "ultrafast", "-crf", "30",
+                "-t", str(PREVIEW_SECONDS),
+            ]
+        elif results["background"]["normalized"]:
+            video_args = ["-c:v", "copy"]
+        else:
+            video_args = [
+                "-vf", "scale=w=720:h=1280:force_original_aspect_ratio=increase,crop=720:1280",
+                "-c:v", "libx264", "-preset", "ultrafast", "-crf", "26",
+            ]
+
+        if audio_path is None:
+            # Streaming: MP3 from the provider on stdin. Its length isn't known
+            # until it ends, so progress runs against an estimate from the text
+            def speak(write):
+                nonlocal narrator
+                narrator = tts.stream(story_text, voice, write, opening=promoted)
+                job_store.update(job_id, tts_provider=narrator)
+
+            feed        = speak
+            audio_args  = ["-f", "mp3", "-i", "pipe:0"]
+            on_progress = _composite_progress(report, tts.estimate_seconds(story_text) or None)
+        else:
+            # ffmpeg reports out_time as it encodes; the render ends with the narration
+            audio_duration = await asyncio.to_thread(probe_seconds, audio_path)
+            if preview and audio_duration:
+                audio_duration = min(audio_duration, PREVIEW_SECONDS)
+            audio_args  = ["-i", audio_path]
+            on_progress = _composite_progress(report, audio_duration)
+
+        if output_mode == "hls" and not preview:
+            # One encode, two muxers: live segments to play now, faststart MP4 to download
+            os.makedirs(hls_dir, exist_ok=True)
+            output_args = ["-flags", "+global_header", "-f", "tee", _tee_outputs(hls_dir, output_path)]
+            on_progress = _announce_stream(job_id, hls_dir, on_progress)
+        else:
+            output_args = ["-movflags", "+faststart", output_path]
 
         def do_composite():
-            subprocess.run(
+            scheduler.run_process(
+                job_id,
                 [
                     "ffmpeg", "-y",
+                    "-nostats", "-progress", "pipe:1",
                     "-stream_loop", "-1",
                     "-i", video_path,
-                    "-i", audio_path,
-                    "-vf", "scale=w=720:h=1280:force_original_aspect_ratio=increase,crop=720:1280",
+                    *audio_args,
                     "-map", "0:v",
                     "-map", "1:a",
-                    "-c:v", "libx264", "-preset", "ultrafast", "-crf", "26",
+                    *video_args,
                     "-c:a", "aac", "-b:a", "128k",
                     "-shortest",
-                    output_path,
+                    *output_args,
                 ],
                 timeout=1800,
-                check=True,
+                on_line=on_progress,
+                feed=feed,
             )
 
         await asyncio.to_thread(do_composite)
 
-        # Clean up temp audio and downloaded video
-        for tmp in [audio_path, downloaded_video]:
-            if tmp:
-                try:
-                    os.remove(tmp)
-                except Exception:
-                    pass
-
-        JOBS[job_id].update({
-            "status":   "done",
-            "progress": 100,
-            "step":     "Complete",
-            "output":   f"{job_id}.mp4",
-        })
+    # Download and TTS don't depend on each other, so they run side by side
+    pipeline = Pipeline(job_id, [
+        Stage("background", "Downloading background video", background, weight=10),
+        Stage("narration",  "Generating audio narration",   narration,  weight=30),
+        Stage("composite",  "Compositing video + audio",    composite,
+              deps=["background", "narration"], weight=60),
+    ])
+
+    started = time.time()
+    queued  = job_store.get(job_id)
+    queue_s = round(max(0.0, started - queued["created"]), 3) if queued else None
+    if queue_s is not None:
+        queue_wait_seconds.observe(queue_s)
+
+    try:
+        job_store.update(job_id, status="processing")
+        results = await pipeline.run()
+
+        job_store.update(
+            job_id,
+            status="done",
+            progress=100,
+            step="Complete",
+            output=os.path.relpath(output_path, OUTPUT_DIR).replace(os.sep, "/"),   # under /api/video/
+            eta=0,
+            # Re-key on the background version actually rendered (a remote clip's is only known now)
+            render_key=_render_key(
+                story_text, video, voice, output_mode, preview, results["background"]["version"], narrator,
+            ),
+            timings=_timings(pipeline, started, queue_s, "done"),
+        )
+
+    except asyncio.CancelledError:
+        # Cancelled via DELETE — drop the half-written render too
+        _remove_quietly(output_path)
+        shutil.rmtree(hls_dir, ignore_errors=True)
+        _timings(pipeline, started, queue_s, "cancelled")
+        raise
 
     except Exception as e:
-        # Clean up any temp files on error too
-        for tmp in [downloaded_video]:
-            if tmp:
-                try:
-                    os.remove(tmp)
-                except Exception:
-                    pass
-        JOBS[job_id].update({
-            "status": "error",
-            "error":  str(e),
-        })
+        job_store.update(job_id, status="error", error=str(e), timings=_timings(pipeline, started, queue_s, "error"))
+
+    finally:
+        # Narration and background both stay in their caches
+        for cache, path in held:
+            cache.release(path)
+
+
+def _timings(pipeline: Pipeline, started: float, queue_s: float | None, status: str) -> dict:
+    """Observe a finished job in /api/metrics and return the timings kept on its record."""
+    total_s = round(time.time() - started, 3)
+    job_seconds.observe(total_s, status=status)
+    jobs_finished.inc(status=status)
+    return {"queue_s": queue_s, "total_s": total_s, "stages": pipeline.timings()}
+
+
+def _composite_progress(report, duration: float | None):
+    """
+    Build an `on_line` handler for `ffmpeg -progress pipe:1` that reports
+    encoded time as a fraction of `duration` along with an ETA.
+    Reports are throttled to a few per second.
+    """
+    state = {"t": 0.0, "speed": None, "last": 0.0}
+
+    def on_line(line: str):
+        key, _, value = line.partition("=")
+        if key == "out_time_us" and value.isdigit():
+            state["t"] = int(value) / 1_000_000
+        elif key == "speed" and value.endswith("x"):
+            try:
+                state["speed"] = float(value[:-1])
+            except ValueError:
+                pass
+        elif key == "progress" and duration:
+            now = time.monotonic()
+            if value != "end" and now - state["last"] < 0.5:
+                return
+            state["last"] = now
+            eta = (duration - state["t"]) / state["speed"] if state["speed"] else None
+            report(
+                min(state["t"] / duration, 1.0 if value == "end" else 0.99),   # durations can be estimates
+                eta=round(max(0.0, eta), 1) if eta is not None else None,
+            )
+
+    return on_line
+
+
+def _render_key(
+    story_text: str, video: dict, voice: str, output_mode: str, preview: bool,
+    asset: str | None = None, narrator: str | None = None,
+) -> str:
+    return render_cache.render_key(
+        story_text,
+        asset or render_cache.asset_version(video),
+        tts.voice_tag(tts.voice_name(voice), narrator, preview),
+        output_mode=output_mode,
+        preview_seconds=PREVIEW_SECONDS if preview else None,
+    )
+
+
+def _tee_outputs(hls_dir: str, mp4_path: str) -> str:
+    """ffmpeg tee spec writing an event HLS playlist with fMP4 segments and a faststart MP4."""
+    hls_opts = ":".join([
+        "f=hls",
+        f"hls_time={HLS_SEGMENT_S}",
+        "hls_list_size=0",
+        "hls_playlist_type=event",
+        "hls_segment_type=fmp4",
+        "hls_fmp4_init_filename=init.mp4",
+        f"hls_segment_filename={hls_dir}/seg_%05d.m4s",
+        "hls_flags=temp_file+independent_segments",
+    ])
+    return f"[{hls_opts}]{hls_dir}/index.m3u8|[f=mp4:movflags=+faststart]{mp4_path}"
+
+
+def _announce_stream(job_id: str, hls_dir: str, on_line):
+    """Wrap an ffmpeg progress handler to publish the playlist URL once it first appears."""
+    playlist  = os.path.join(hls_dir, "index.m3u8")
+    announced = False
+
+    def wrapped(line: str):
+        nonlocal announced
+        if not announced and line.startswith("progress=") and os.path.exists(playlist):
+            announced = True
+            job_store.update(job_id, stream=f"/api/generate/{job_id}/hls/index.m3u8")
+        on_line(line)
+
+    return wrapped
+
+
+def _remove_quietly(path: str):
+    try:
+        os.remove(path)
+    except Exception:
+        pass
+
+
+async def run_job(job_id: str, payload: dict):
+    """Scheduler entry point: re-hydrate a stored job and run it."""
+    await run_generation(
+        job_id, payload["story"], payload["video"],
+        payload.get("voice", "male"), payload.get("output_mode", "mp4"),
+        payload.get("preview", False), payload.get("batch_id"), payload.get("promoted", False),
+    )
+
+scheduler.runner = run_job
 
 
 @router.post("/generate")
-async def start_generation(
-    request: GenerateRequest,
-    background_tasks: BackgroundTasks,
-):
+async def start_generation(request: GenerateRequest):
     """Queue a video generation job and return a job ID immediately."""
     story = request.story
     video = request.video
@@ -161,38 +394,346 @@ async def start_generation(
     if not video:
         raise HTTPException(status_code=422, detail="A video selection is required.")
 
-    job_id = str(uuid.uuid4())[:12]
-    JOBS[job_id] = {
-        "job_id":   job_id,
-        "status":   "queued",
-        "progress": 0,
-        "step":     "Queued",
-        "output":   None,
-        "error":    None,
-    }
+    # Same text, background version, voice and settings → same video; don't render it twice
+    render_key = _render_key(
+        expand_acronyms(story["text"]), video, voice,
+        request.output_mode, request.preview,
+    )
+    existing = render_cache.find(render_key, OUTPUT_DIR)
+    if existing:
+        return _attach(existing)
 
-    background_tasks.add_task(run_generation, job_id, story, video, voice)
+    job_id = str(uuid.uuid4())[:12]
+    try:
+        position = scheduler.submit(
+            job_id,
+            {
+                "story": story, "video": video, "voice": voice,
+                "output_mode": request.output_mode, "preview": request.preview,
+            },
+            priority=request.priority,
+            preview=request.preview,
+            render_key=render_key,
+        )
+    except QueueFull:
+        raise HTTPException(status_code=429, detail="Too many videos in the queue. Try again shortly.")
 
     return {
         "job_id":  job_id,
         "status":  "queued",
+        "queue_position": position,
         "message": "Generation job started. Poll /api/generate/{job_id}/status for updates.",
     }
 
 
+def _touch_output(job: dict):
+    """A result someone is still looking at shouldn't be evicted from under them."""
+    if job["status"] == "done" and job.get("output"):
+        touch(os.path.join(OUTPUT_DIR, job["output"]))
+
+
+def _active_files():
+    """Outputs being written and inputs about to be read by queued / running jobs."""
+    for status in ("queued", "processing"):
+        for job in job_store.list_by_status(status):
+            yield shard_path(OUTPUT_DIR, job["job_id"], f"{job['job_id']}.mp4")
+            yield shard_path(OUTPUT_DIR, job["job_id"])
+            payload = job_store.get_payload(job["job_id"]) or {}
+            if payload.get("video", {}).get("file_path"):
+                yield payload["video"]["file_path"]
+
+storage.protectors.append(_active_files)
+
+
+def _attach(job: dict) -> dict:
+    """Hand an identical request the existing job. In-flight jobs count their requesters for DELETE."""
+    if job["status"] != "done":
+        job_store.increment(job["job_id"], "attached")
+    return {
+        "job_id":  job["job_id"],
+        "status":  job["status"],
+        "queue_position": scheduler.position(job["job_id"]),
+        "output":  job["output"],
+        "deduplicated": True,
+        "message": "An identical video is already rendered or rendering; following that job.",
+    }
+
+
 @router.get("/generate/{job_id}/status")
 async def get_job_status(job_id: str):
     """Poll the status and progress of a generation job."""
-    job = JOBS.get(job_id)
+    job = job_store.get(job_id)
     if not job:
         raise HTTPException(status_code=404, detail="Job not found.")
-    return job
+    _touch_output(job)
+    return {**job, "queue_position": scheduler.position(job_id)}
 
 
 @router.delete("/generate/{job_id}")
 async def cancel_job(job_id: str):
-    """Cancel and remove a job (cleanup)."""
-    if job_id not in JOBS:
+    """Cancel and remove a job, terminating its ffmpeg process if it is running."""
+    job = job_store.get(job_id)
+    if job and job.get("attached", 1) > 1 and job["status"] in ("queued", "processing"):
+        # Other identical requests are still waiting on this render
+        job_store.increment(job_id, "attached", -1)
+        return {"message": "Detached from shared job."}
+    if not await scheduler.cancel(job_id):
         raise HTTPException(status_code=404, detail="Job not found.")
-    del JOBS[job_id]
     return {"message": "Job cancelled."}
+
+
+def _video_key(video: dict) -> str:
+    return video.get("id") or video.get("url") or video.get("file_path", "")
+
+
+async def _resolve_shared_inputs(payloads: list[dict]):
+    """
+    Fetch and ingest each distinct background of a batch once, and synthesize
+    each distinct narration while its renders are still queued — network-bound
+    work that overlaps the CPU-bound encodes. Jobs pick the results up from the
+    caches (or wait on the same in-flight work); failures are left for the job
+    to hit and report itself.
+    """
+    videos     = {_video_key(p["video"]): p["video"] for p in payloads}
+    narrations = {
+        (expand_acronyms(p["story"]["text"]), tts.voice_name(p["voice"]))
+        for p in payloads
+    }
+    limit = asyncio.Semaphore(BATCH_TTS_CONCURRENCY)
+
+    async def narrate(text: str, voice: str):
+        async with limit:
+            await asyncio.to_thread(tts.narrate, text, voice)
+
+    await asyncio.gather(
+        *(prefetch(v) for v in videos.values()),
+        *(narrate(text, voice) for text, voice in narrations),
+        return_exceptions=True,
+    )
+
+
+@router.post("/generate/batch")
+async def start_batch(request: BatchRequest):
+    """
+    Queue many renders at once. Identical items share one job, each distinct
+    background and narration is resolved once for the whole batch, and the
+    renders themselves run on the shared worker pool like any other job.
+    """
+    if not request.items:
+        raise HTTPException(status_code=422, detail="A batch needs at least one item.")
+    if len(request.items) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=422, detail=f"Batches are limited to {BATCH_MAX_ITEMS} items.")
+    if any(not item.story.get("text") or not item.video for item in request.items):
+        raise HTTPException(status_code=422, detail="Every item needs story text and a video selection.")
+
+    batch_id = str(uuid.uuid4())[:12]
+    payloads: dict[str, dict] = {}   # job_id → payload, one per distinct item
+    by_item:  dict[str, str]  = {}
+    job_ids:  list[str]       = []
+    keys:     dict[str, str]  = {}   # job_id → render key
+    for item in request.items:
+        key    = _render_key(
+            expand_acronyms(item.story["text"]), item.video, item.voice,
+            request.output_mode, False,
+        )
+        job_id = by_item.get(key)
+        if job_id is None:
+            existing = render_cache.find(key, OUTPUT_DIR)
+            if existing:
+                # Already rendered / rendering outside this batch — reuse it
+                job_id = by_item[key] = existing["job_id"]
+            else:
+                job_id = by_item[key] = str(uuid.uuid4())[:12]
+                keys[job_id]     = key
+                payloads[job_id] = {
+                    "story": item.story, "video": item.video, "voice": item.voice,
+                    "output_mode": request.output_mode, "batch_id": batch_id,
+                }
+        job_ids.append(job_id)
+
+    if scheduler.depth() + len(payloads) > scheduler.max_queue:
+        raise HTTPException(status_code=429, detail="Not enough room in the queue for this batch.")
+    submitted = []
+    try:
+        for job_id, payload in payloads.items():
+            scheduler.submit(
+                job_id, payload, priority=request.priority, batch_id=batch_id, render_key=keys[job_id],
+            )
+            submitted.append(job_id)
+    except QueueFull:
+        for job_id in submitted:
+            await scheduler.cancel(job_id)
+        raise HTTPException(status_code=429, detail="Not enough room in the queue for this batch.")
+    job_store.create_batch(batch_id, job_ids)
+
+    if payloads:
+        task = asyncio.create_task(_resolve_shared_inputs(list(payloads.values())))
+        _batch_tasks.add(task)
+        task.add_done_callback(_batch_tasks.discard)
+
+    return {
+        "batch_id": batch_id,
+        "status":   "queued",
+        "items":    len(job_ids),
+        "jobs":     len(payloads),
+        "job_ids":  job_ids,
+        "message":  "Batch queued. Poll /api/generate/batch/{batch_id} for progress.",
+    }
+
+
+@router.get("/generate/batch/{batch_id}")
+async def get_batch_status(batch_id: str):
+    """Aggregate progress of a batch plus the state of each item, in submission order."""
+    batch = job_store.get_batch(batch_id)
+    if not batch:
+        raise HTTPException(status_code=404, detail="Batch not found.")
+
+    jobs  = {job_id: job_store.get(job_id) for job_id in set(batch["job_ids"])}
+    items = []
+    for index, job_id in enumerate(batch["job_ids"]):
+        job = jobs[job_id]
+        items.append({
+            "index":    index,
+            "job_id":   job_id,
+            "status":   job["status"] if job else "gone",   # cancelled or expired
+            "progress": job["progress"] if job else 0,
+            "output":   job["output"] if job else None,
+            "error":    job["error"] if job else None,
+        })
+
+    counts = {}
+    for item in items:
+        counts[item["status"]] = counts.get(item["status"], 0) + 1
+    if counts.get("queued", 0) == len(items):
+        status = "queued"
+    elif counts.get("queued", 0) or counts.get("processing", 0):
+        status = "processing"
+    else:
+        status = "done" if counts.get("done", 0) == len(items) else "error"
+
+    return {
+        "batch_id": batch_id,
+        "status":   status,
+        "progress": round(sum(i["progress"] for i in items) / len(items)),
+        "counts":   counts,
+        "items":    items,
+    }
+
+
+@router.delete("/generate/batch/{batch_id}")
+async def cancel_batch(batch_id: str):
+    """Cancel the batch's own jobs that are still queued or running, then forget the batch."""
+    batch = job_store.get_batch(batch_id)
+    if not batch:
+        raise HTTPException(status_code=404, detail="Batch not found.")
+    for job_id in dict.fromkeys(batch["job_ids"]):
+        job = job_store.get(job_id)
+        if job and job.get("batch_id") == batch_id and job["status"] in ("queued", "processing"):
+            await scheduler.cancel(job_id)
+    job_store.delete_batch(batch_id)
+    return {"message": "Batch cancelled."}
+
+
+@router.post("/generate/{job_id}/promote")
+async def promote_preview(job_id: str):
+    """
+    Queue the full render for a preview job. It reuses the preview's cached
+    narration chunk and background, so only the remaining audio and the full
+    encode are new work. Promoting twice returns the same full job.
+    """
+    job     = job_store.get(job_id)
+    payload = job_store.get_payload(job_id)
+    if not job or payload is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    if not payload.get("preview"):
+        raise HTTPException(status_code=409, detail="Only preview jobs can be promoted.")
+
+    full = job_store.get(job["promoted_to"]) if job.get("promoted_to") else None
+    if full:
+        return {"job_id": full["job_id"], "status": full["status"],
+                "queue_position": scheduler.position(full["job_id"])}
+
+    # The full render may already exist or be running (requested directly, or promoted from another preview)
+    render_key = _render_key(
+        expand_acronyms(payload["story"]["text"]), payload["video"],
+        payload.get("voice", "male"), payload.get("output_mode", "mp4"), False,
+    )
+    existing = render_cache.find(render_key, OUTPUT_DIR)
+    if existing:
+        job_store.update(job_id, promoted_to=existing["job_id"])
+        return _attach(existing)
+
+    full_id = str(uuid.uuid4())[:12]
+    try:
+        position = scheduler.submit(
+            full_id, {**payload, "preview": False, "promoted": True},
+            priority=job["priority"], preview_of=job_id, render_key=render_key,
+        )
+    except QueueFull:
+        raise HTTPException(status_code=429, detail="Too many videos in the queue. Try again shortly.")
+    job_store.update(job_id, promoted_to=full_id)
+
+    return {"job_id": full_id, "status": "queued", "queue_position": position}
+
+
+@router.get("/generate/{job_id}/hls/{filename}")
+async def get_hls_file(job_id: str, filename: str):
+    """Playlist and segments of an HLS render; readable while the job is still encoding."""
+    path = os.path.join(shard_path(OUTPUT_DIR, job_id), filename)
+    if not HLS_FILES.fullmatch(filename) or not re.fullmatch(r"[\w-]+", job_id) or not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="Stream file not found.")
+
+    if filename.endswith(".m3u8"):
+        touch(path)   # being watched — keep the render through eviction
+        # The playlist grows until the render ends — never let it be cached
+        return FileResponse(path, media_type="application/vnd.apple.mpegurl",
+                            headers={"Cache-Control": "no-cache"})
+    return FileResponse(path, media_type="video/mp4",
+                        headers={"Cache-Control": "public, max-age=31536000, immutable"})
+
+
+@router.get("/tts/cache")
+async def get_tts_cache_stats():
+    """Hit/miss counters and size of the narration cache."""
+    return tts_cache.stats()
+
+
+@router.post("/tts/cache/{key}/pin")
+async def pin_tts_audio(key: str, pinned: bool = True):
+    """Pin (or unpin with ?pinned=false) a cached narration so LRU eviction skips it."""
+    if not tts_cache.pin(key, pinned):
+        raise HTTPException(status_code=404, detail="Cached audio not found.")
+    return {"key": key, "pinned": pinned}
+
+
+@router.get("/generate/{job_id}/events")
+async def stream_job_events(job_id: str):
+    """Server-sent events: one `data:` message with the job every time it changes."""
+    if job_store.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+
+    async def events():
+        last, sent_at = None, time.monotonic()
+        while True:
+            job = job_store.get(job_id)
+            if job is None:
+                yield "event: gone\ndata: {}\n\n"
+                return
+            job = {**job, "queue_position": scheduler.position(job_id)}
+            if job != last:
+                yield f"data: {json.dumps(job)}\n\n"
+                last, sent_at = job, time.monotonic()
+            elif time.monotonic() - sent_at > 15:
+                yield ": keep-alive\n\n"
+                sent_at = time.monotonic()
+            if job["status"] in ("done", "error"):
+                _touch_output(job)
+                return
+            # Local updates wake us immediately; the timeout catches other worker processes
+            await wait_for_change(job_id, timeout=2.0)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,56 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from services import asset_cache, tts_cache
+from services.metrics import registry, reddit_cache_requests
+from services.scheduler import scheduler
+from services.storage import storage
+
+router = APIRouter()
+
+PROMETHEUS_TEXT = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _disk_caches() -> dict:
+    return {"assets": asset_cache.cache.stats, "tts": tts_cache.cache.stats}
+
+
+def _hit_ratios() -> dict:
+    out = {}
+    for name, stats in _disk_caches().items():
+        lookups   = stats["hits"] + stats["misses"]
+        out[name] = stats["hits"] / lookups if lookups else None
+    # A stale Reddit listing is still answered from memory
+    served = reddit_cache_requests.value(result="hit") + reddit_cache_requests.value(result="stale")
+    lookups = served + reddit_cache_requests.value(result="miss")
+    out["reddit"] = served / lookups if lookups else None
+    return out
+
+
+# ── Read at scrape time ───────────────────────────────────────────────────────
+registry.gauge("storyscroll_queue_depth", "Generation jobs waiting for a worker.", scheduler.depth)
+registry.gauge("storyscroll_jobs_running", "Generation jobs being processed right now.", scheduler.active)
+registry.gauge("storyscroll_ffmpeg_processes", "ffmpeg processes currently running.", scheduler.process_count)
+registry.gauge("storyscroll_cache_hit_ratio", "Share of lookups answered from cache.", _hit_ratios, label="cache")
+registry.gauge(
+    "storyscroll_cache_hits_total", "Disk cache hits.",
+    lambda: {k: v["hits"] for k, v in _disk_caches().items()}, label="cache", kind="counter",
+)
+registry.gauge(
+    "storyscroll_cache_misses_total", "Disk cache misses.",
+    lambda: {k: v["misses"] for k, v in _disk_caches().items()}, label="cache", kind="counter",
+)
+registry.gauge(
+    "storyscroll_cache_evictions_total", "Disk cache evictions.",
+    lambda: {k: v["evictions"] for k, v in _disk_caches().items()}, label="cache", kind="counter",
+)
+registry.gauge(
+    "storyscroll_storage_evicted_bytes_total", "Bytes freed by storage quota enforcement.",
+    lambda: storage.stats["evicted_bytes"], kind="counter",
+)
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus text exposition for this process: stage/job/probe/Reddit timings, queue and caches."""
+    return PlainTextResponse(registry.render(), media_type=PROMETHEUS_TEXT)
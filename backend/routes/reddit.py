@@ -1,11 +1,58 @@
-from fastapi import APIRouter, Query, HTTPException
+from fastapi import APIRouter, Query, HTTPException, Response
+import asyncio
+import base64
+import hashlib
+import importlib.util
+import json
+import math
+import os
+import re
+import time
 import httpx
 
+from services.metrics import reddit_upstream_seconds, reddit_cache_requests
+
 router = APIRouter()
 
-REDDIT_BASE = "https://www.reddit.com"
+REDDIT_BASE = os.getenv("REDDIT_BASE", "https://www.reddit.com")   # point at a stand-in server for tests
 HEADERS     = {"User-Agent": "StoryScroll/0.1 (story video generator)"}
 
+# ── Response cache ────────────────────────────────────────────────────────────
+# Fresh for TTL seconds; after that served stale (while one refresh runs) until STALE.
+REDDIT_CACHE_TTL_S   = int(os.getenv("REDDIT_CACHE_TTL_S", "60"))
+REDDIT_CACHE_STALE_S = int(os.getenv("REDDIT_CACHE_STALE_S", "600"))
+REDDIT_CACHE_MAX     = 512
+
+_cache:    dict[tuple, dict] = {}          # key → {"payload", "fetched_at"}
+_inflight: dict[tuple, asyncio.Task] = {}  # key → the one upstream fetch everyone waits on
+_rate_limited_until = 0.0                  # from Reddit's X-Ratelimit-* / Retry-After headers
+
+# ── Pooled client ─────────────────────────────────────────────────────────────
+_HTTP2 = importlib.util.find_spec("h2") is not None   # httpx[http2]
+
+_client: httpx.AsyncClient | None = None
+
+
+def get_client() -> httpx.AsyncClient:
+    """App-lifetime client so connections to reddit.com are kept alive and reused."""
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            timeout=10.0,
+            follow_redirects=True,
+            http2=_HTTP2,
+            headers=HEADERS,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60),
+        )
+    return _client
+
+
+async def close_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
 # Subreddits we explicitly support — custom ones are passed through
 SUPPORTED_SUBS = {
     "tifu", "nosleep", "amitheassshole", "relationship_advice",
@@ -19,6 +66,16 @@ SORT_MAP = {
     "new":  "/new.json",
 }
 
+# Reddit's own rules: 2–21 word characters; listing cursors are post fullnames
+SUBREDDIT_NAME = re.compile(r"\w{2,21}")
+AFTER_TOKEN    = re.compile(r"t3_\w+")
+
+
+def check_subreddit(name: str) -> str:
+    if not SUBREDDIT_NAME.fullmatch(name):
+        raise HTTPException(status_code=400, detail=f"Invalid subreddit name {name!r}.")
+    return name
+
 
 def parse_post(post: dict) -> dict | None:
     """Extract clean fields from a Reddit API post object."""
@@ -42,33 +99,54 @@ def parse_post(post: dict) -> dict | None:
         "url":       f"https://reddit.com{data.get('permalink', '')}",
         "created":   data.get("created_utc"),
         "nsfw":      data.get("over_18", False),
+        "crosspost_of": (data.get("crosspost_parent") or "").removeprefix("t3_") or None,
     }
 
 
-@router.get("/reddit/stories")
-async def get_reddit_stories(
-    subreddit: str = Query("tifu", description="Subreddit name (without r/)"),
-    sort:      str = Query("hot",  description="Sort: hot | top | new"),
-    limit:     int = Query(20,    ge=1, le=50),
-):
-    """Proxy Reddit's public JSON endpoint and return clean story data."""
-    sort      = sort if sort in SORT_MAP else "hot"
-    path      = SORT_MAP[sort]
-    separator = "&" if "?" in path else "?"
-    url       = f"{REDDIT_BASE}/r/{subreddit}{path}{separator}limit={limit}&raw_json=1"
+def _note_rate_limit(resp: httpx.Response):
+    """Stop calling Reddit until its rate-limit window resets."""
+    global _rate_limited_until
+    if resp.status_code == 429:
+        try:
+            wait = float(resp.headers.get("Retry-After", "60"))
+        except ValueError:
+            wait = 60.0
+        _rate_limited_until = time.time() + wait
+        return
+    remaining = resp.headers.get("X-Ratelimit-Remaining")
+    reset     = resp.headers.get("X-Ratelimit-Reset")
+    try:
+        if remaining is not None and reset is not None and float(remaining) < 1:
+            _rate_limited_until = time.time() + float(reset)
+    except ValueError:
+        pass
 
+
+async def _fetch_listing(subreddit: str, sort: str, limit: int, after: str | None = None) -> dict:
+    """One upstream call to Reddit's public JSON listing, parsed into clean stories."""
+    url    = f"{REDDIT_BASE}/r/{subreddit}{SORT_MAP[sort]}"
+    params = {"limit": limit, "raw_json": 1}
+    if after:
+        params["after"] = after
+
+    started = time.perf_counter()
     try:
-        async with httpx.AsyncClient(timeout=10.0, follow_redirects=True) as client:
-            resp = await client.get(url, headers=HEADERS)
+        resp = await get_client().get(url, params=params)
     except httpx.TimeoutException:
+        reddit_upstream_seconds.observe(time.perf_counter() - started, outcome="timeout")
         raise HTTPException(status_code=504, detail="Reddit request timed out.")
     except httpx.RequestError as e:
+        reddit_upstream_seconds.observe(time.perf_counter() - started, outcome="error")
         raise HTTPException(status_code=502, detail=f"Could not reach Reddit: {e}")
+    reddit_upstream_seconds.observe(time.perf_counter() - started, outcome=resp.status_code)
 
+    _note_rate_limit(resp)
     if resp.status_code == 404:
         raise HTTPException(status_code=404, detail=f"Subreddit r/{subreddit} not found.")
     if resp.status_code == 403:
         raise HTTPException(status_code=403, detail=f"r/{subreddit} is private or restricted.")
+    if resp.status_code == 429:
+        raise HTTPException(status_code=429, detail="Reddit is rate limiting us. Try again shortly.")
     if resp.status_code != 200:
         raise HTTPException(status_code=502, detail=f"Reddit returned {resp.status_code}.")
 
@@ -85,4 +163,197 @@ async def get_reddit_stories(
         "sort":      sort,
         "count":     len(stories),
         "stories":   stories,
+        "after":     data["data"].get("after"),
+    }
+
+
+def _refresh(key: tuple) -> asyncio.Task:
+    """Start (or join) the upstream fetch for `key`; the result lands in the cache."""
+    task = _inflight.get(key)
+    if task is None:
+        async def run():
+            payload = await _fetch_listing(*key)
+            _cache[key] = {"payload": payload, "fetched_at": time.time()}
+            if len(_cache) > REDDIT_CACHE_MAX:
+                oldest = min(_cache, key=lambda k: _cache[k]["fetched_at"])
+                del _cache[oldest]
+            return payload
+
+        task = asyncio.create_task(run())
+        _inflight[key] = task
+        task.add_done_callback(lambda t: (_inflight.pop(key, None), t.cancelled() or t.exception()))
+    return task
+
+
+async def get_listing(subreddit: str, sort: str, limit: int, after: str | None = None) -> tuple[dict, str]:
+    """
+    Cached listing for (subreddit, sort, limit, after) and how it was served:
+    "hit" (fresh), "stale" (refresh running in the background) or "miss".
+    """
+    key   = (subreddit.lower(), sort, limit, after)
+    entry = _cache.get(key)
+    age   = time.time() - entry["fetched_at"] if entry else None
+
+    if entry and age < REDDIT_CACHE_TTL_S:
+        reddit_cache_requests.inc(result="hit")
+        return entry["payload"], "hit"
+
+    limited = time.time() < _rate_limited_until
+    if entry and (age < REDDIT_CACHE_STALE_S or limited):
+        if not limited:
+            _refresh(key)
+        reddit_cache_requests.inc(result="stale")
+        return entry["payload"], "stale"
+    if limited:
+        raise HTTPException(
+            status_code=429,
+            detail="Reddit is rate limiting us. Try again shortly.",
+            headers={"Retry-After": str(int(_rate_limited_until - time.time()) + 1)},
+        )
+
+    reddit_cache_requests.inc(result="miss")
+    return await asyncio.shield(_refresh(key)), "miss"
+
+
+@router.get("/reddit/stories")
+async def get_reddit_stories(
+    response:  Response,
+    subreddit: str = Query("tifu", description="Subreddit name (without r/)"),
+    sort:      str = Query("hot",  description="Sort: hot | top | new"),
+    limit:     int = Query(20,    ge=1, le=50),
+):
+    """Proxy Reddit's public JSON endpoint and return clean story data."""
+    sort = sort if sort in SORT_MAP else "hot"
+    payload, cache_status = await get_listing(check_subreddit(subreddit), sort, limit)
+    response.headers["X-Cache"] = cache_status
+    return payload
+
+
+# ── Multi-subreddit feed ──────────────────────────────────────────────────────
+REDDIT_FANOUT    = int(os.getenv("REDDIT_FANOUT", "4"))   # concurrent upstream calls per feed request
+FEED_MAX_SUBS    = 10
+FEED_SEEN_MAX    = 200    # dedupe keys carried in the cursor across pages
+IDEAL_WORDS      = (300, 1200)   # roughly a 2–8 minute narration
+
+
+def _encode_cursor(state: dict) -> str:
+    raw = json.dumps(state, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> dict:
+    """The cursor comes back from the client, so hold it to what we would have issued."""
+    try:
+        raw   = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        state = json.loads(raw)
+        after, seen = state["after"], state["seen"]
+        assert state["sort"] in SORT_MAP
+        assert isinstance(after, dict) and 0 < len(after) <= FEED_MAX_SUBS
+        assert all(SUBREDDIT_NAME.fullmatch(s) for s in after)
+        assert all(a is None or (isinstance(a, str) and AFTER_TOKEN.fullmatch(a)) for a in after.values())
+        assert isinstance(seen, list) and len(seen) <= FEED_SEEN_MAX
+        assert all(isinstance(k, str) and len(k) <= 16 for k in seen)
+        return state
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+
+def _dedupe_key(story: dict) -> str:
+    """Crossposts and reposts of the same text collapse onto one key."""
+    text = re.sub(r"\W+", " ", f"{story['title']} {story['body'][:500]}").lower().strip()
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:10]
+
+
+def _rank(story: dict, now: float) -> float:
+    """Blend popularity, freshness and how well the length suits a short video."""
+    words     = story["word_count"]
+    upvotes   = math.log10(1 + max(0, story["upvotes"] or 0)) / 5          # ~1.0 at 100k
+    age_h     = max(0.0, (now - (story["created"] or now)) / 3600)
+    recency   = math.exp(-age_h / 48)
+    lo, hi    = IDEAL_WORDS
+    length    = 1.0 if lo <= words <= hi else (words / lo if words < lo else hi / words)
+    return round(0.5 * upvotes + 0.3 * recency + 0.2 * length, 4)
+
+
+@router.get("/reddit/feed")
+async def get_reddit_feed(
+    subreddits: str | None = Query(None, description="Comma-separated subreddits (default: all supported)"),
+    sort:       str = Query("hot", description="Sort: hot | top | new (a cursor keeps its own)"),
+    limit:      int = Query(20, ge=1, le=50, description="Most stories per page"),
+    cursor:     str | None = Query(None, description="Opaque cursor from the previous page"),
+):
+    """
+    Merged, ranked story feed across several subreddits. Each page splits
+    `limit` between the subreddits and fetches exactly that many posts from
+    each, concurrently, so everything fetched is served and the next page
+    carries on right after it. Pass `next_cursor` back as `cursor` to continue.
+    """
+    state = _decode_cursor(cursor) if cursor else None
+
+    if state:
+        subs, sort = list(state["after"]), state["sort"]
+    else:
+        sort  = sort if sort in SORT_MAP else "hot"
+        subs  = [s.strip() for s in (subreddits or ",".join(sorted(SUPPORTED_SUBS))).split(",") if s.strip()]
+        subs  = [check_subreddit(s) for s in dict.fromkeys(subs)][:FEED_MAX_SUBS]
+        state = {"after": {s: None for s in subs}, "seen": []}
+    if not subs:
+        return {"count": 0, "stories": [], "next_cursor": None, "errors": {}}
+
+    # The remainder goes to the first subreddits; the cursor rotates them so it evens out
+    share, extra = divmod(limit, len(subs))
+    quota = {sub: share + (i < extra) for i, sub in enumerate(subs)}
+    sem   = asyncio.Semaphore(REDDIT_FANOUT)
+
+    async def fetch(sub: str):
+        async with sem:
+            payload, _ = await get_listing(sub, sort, quota[sub], state["after"][sub])
+            return payload
+
+    fetched = [s for s in subs if quota[s]]
+    results = dict(zip(fetched, await asyncio.gather(*(fetch(s) for s in fetched), return_exceptions=True)))
+
+    now, seen = time.time(), dict.fromkeys(state["seen"])   # ordered, so the cursor keeps the newest
+    merged, errors, next_after = [], {}, {}
+    for sub in subs:
+        result = results.get(sub)
+        if result is None:
+            next_after[sub] = state["after"][sub]   # not its turn this page
+            continue
+        if isinstance(result, HTTPException):
+            errors[sub] = result.detail
+            continue
+        if isinstance(result, BaseException):
+            raise result
+        if result["after"]:
+            next_after[sub] = result["after"]
+        for story in result["stories"]:
+            key = _dedupe_key(story)
+            if any(k in seen for k in (key, story["crosspost_of"]) if k):
+                continue
+            seen.update(dict.fromkeys((key, story["id"])))
+            words = len(f"{story['title']} {story['body']}".split())
+            merged.append({**story, "word_count": words})
+
+    for story in merged:
+        story["rank"] = _rank(story, now)
+    merged.sort(key=lambda s: s["rank"], reverse=True)
+
+    next_cursor = None
+    if next_after:
+        order = list(next_after)
+        order = order[extra:] + order[:extra]
+        next_cursor = _encode_cursor({
+            "sort":  sort,
+            "after": {sub: next_after[sub] for sub in order},
+            "seen":  list(seen)[-FEED_SEEN_MAX:],
+        })
+
+    return {
+        "subreddits":  subs,
+        "sort":        sort,
+        "count":       len(merged),
+        "stories":     merged,
+        "next_cursor": next_cursor,
+        "errors":      errors,
     }
@@ -1,15 +1,24 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel
-import aiofiles
+import codecs
 import os
 import uuid
 
+from services.uploads import UPLOAD_FORM_DOC, receive_upload, UploadTooLarge, InvalidUpload
+
 router = APIRouter()
 
-UPLOAD_DIR = "uploads"
+UPLOAD_DIR          = "uploads"
+MAX_STORY_UPLOAD_KB = int(os.getenv("MAX_STORY_UPLOAD_KB", "1024"))
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 
+def check_text_header(head: bytes):
+    """Binary files (images, PDFs, .docx) show NUL bytes right away; plain text never does."""
+    if b"\x00" in head:
+        raise InvalidUpload("File must be UTF-8 encoded text.")
+
+
 class StoryPayload(BaseModel):
     text: str
     source: str = "manual"   # "write" | "paste" | "upload" | "reddit"
@@ -37,30 +46,43 @@ async def receive_story(payload: StoryPayload):
     }
 
 
-@router.post("/story/upload")
-async def upload_story_file(file: UploadFile = File(...)):
-    """Accept a .txt or .md file and return its contents as story text."""
-    if not file.filename.endswith((".txt", ".md")):
-        raise HTTPException(status_code=400, detail="Only .txt and .md files are supported.")
+@router.post("/story/upload", openapi_extra=UPLOAD_FORM_DOC)
+async def upload_story_file(request: Request):
+    """Accept a .txt or .md file (multipart field `file`) and return its contents as story text."""
+
+    def check_filename(name: str):
+        if not name.endswith((".txt", ".md")):
+            raise InvalidUpload("Only .txt and .md files are supported.")
 
-    contents = await file.read()
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    parts   = []
     try:
-        text = contents.decode("utf-8").strip()
+        saved = await receive_upload(
+            request, UPLOAD_DIR,
+            max_bytes=MAX_STORY_UPLOAD_KB * 1024,
+            check_filename=check_filename,
+            check_header=check_text_header,
+            on_chunk=lambda chunk: parts.append(decoder.decode(chunk)),
+        )
+        parts.append(decoder.decode(b"", final=True))
+    except UploadTooLarge:
+        raise HTTPException(status_code=413, detail=f"Story files are limited to {MAX_STORY_UPLOAD_KB} KB.")
+    except InvalidUpload as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except UnicodeDecodeError:
         raise HTTPException(status_code=400, detail="File must be UTF-8 encoded text.")
 
+    text = "".join(parts).strip()
     if not text:
+        if not saved["duplicate"]:
+            os.remove(saved["path"])
         raise HTTPException(status_code=400, detail="Uploaded file is empty.")
 
-    # Persist for later processing
-    file_id   = str(uuid.uuid4())[:8]
-    save_path = os.path.join(UPLOAD_DIR, f"{file_id}_{file.filename}")
-    async with aiofiles.open(save_path, "w", encoding="utf-8") as f:
-        await f.write(text)
+    file_id = saved["sha256"][:16]   # stored once per distinct content
 
     return {
         "file_id":   file_id,
-        "filename":  file.filename,
+        "filename":  saved["filename"],
         "word_count": len(text.split()),
         "char_count": len(text),
         "text":      text,
@@ -1,38 +1,55 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Query
-import aiofiles
+from fastapi import APIRouter, HTTPException, Query, Request
+import asyncio
 import os
-import uuid
 import subprocess
 import json
+import re
+
+from services import asset_cache, renditions
+from services.catalog import catalog
+from services.metrics import ffprobe_seconds
+from services.storage import shard_path, storage
+from services.uploads import UPLOAD_FORM_DOC, receive_upload, check_video_header, UploadTooLarge, InvalidUpload
 
 router = APIRouter()
 
-VIDEOS_DIR = "videos"
+VIDEOS_DIR    = "videos"
+MAX_UPLOAD_MB = int(os.getenv("MAX_UPLOAD_MB", "500"))
 os.makedirs(VIDEOS_DIR, exist_ok=True)
 
+# Prefetch tasks in flight (kept referenced so they aren't garbage-collected)
+_prefetching: set[asyncio.Task] = set()
+
 
-def probe_duration(file_path: str) -> str | None:
-    """Use ffprobe to read the actual video duration. Returns 'M:SS' or None."""
+def probe_seconds(file_path: str) -> float | None:
+    """Use ffprobe to read a media file's duration in seconds, or None."""
     if not os.path.exists(file_path):
         return None
     try:
-        result = subprocess.run(
-            [
-                "ffprobe", "-v", "quiet",
-                "-print_format", "json",
-                "-show_entries", "format=duration",
-                file_path,
-            ],
-            capture_output=True, text=True, timeout=5,
-        )
-        data     = json.loads(result.stdout)
-        duration = float(data["format"]["duration"])
-        mins     = int(duration // 60)
-        secs     = int(duration % 60)
-        return f"{mins}:{secs:02d}"
+        with ffprobe_seconds.time(kind="duration"):
+            result = subprocess.run(
+                [
+                    "ffprobe", "-v", "quiet",
+                    "-print_format", "json",
+                    "-show_entries", "format=duration",
+                    file_path,
+                ],
+                capture_output=True, text=True, timeout=5,
+            )
+        data = json.loads(result.stdout)
+        return float(data["format"]["duration"])
     except Exception:
         return None
 
+
+def format_duration(seconds: float | None) -> str | None:
+    """Seconds → 'M:SS'."""
+    if seconds is None:
+        return None
+    mins = int(seconds // 60)
+    secs = int(seconds % 60)
+    return f"{mins}:{secs:02d}"
+
 # ── Video library ─────────────────────────────────────────────────────────────
 # For each entry, paste your Cloudinary URL into the "url" field.
 # Leave url as "" to fall back to local file_path (local dev only).
@@ -112,55 +129,168 @@ VIDEO_LIBRARY: list[dict] = [
 ]
 
 
+# Library clips (and their renditions) are never evicted by the storage manager
+storage.protectors.append(lambda: [
+    path for v in VIDEO_LIBRARY
+    for path in (v["file_path"], (renditions.get_record(v["id"]) or {}).get("path")) if path
+])
+
+# Indexed lookups instead of scanning VIDEO_LIBRARY on every request
+_BY_ID:       dict[str, dict]       = {v["id"]: v for v in VIDEO_LIBRARY}
+_BY_CATEGORY: dict[str, list[dict]] = {}
+for _v in VIDEO_LIBRARY:
+    _BY_CATEGORY.setdefault(_v["categoryId"], []).append(_v)
+CATEGORIES = list({v["categoryId"]: v["category"] for v in VIDEO_LIBRARY}.items())
+
+
+_UPLOAD_ID = re.compile(r"[0-9a-f]{16}")
+
+
+def trusted_id(video: dict) -> str | None:
+    """
+    The clip's id, if the server issued it: a library id whose source matches
+    the library entry, or an upload's content hash matching its stored path.
+    Anything else (a client-made id) is None, so it never keys the renditions index.
+    """
+    video_id = video.get("id")
+    if not video_id:
+        return None
+    entry = _BY_ID.get(video_id)
+    if entry:
+        source = video.get("url") or video.get("file_path")
+        return video_id if source in (entry["url"], entry["file_path"]) else None
+    path = video.get("file_path") or ""
+    if video.get("url") or not _UPLOAD_ID.fullmatch(video_id):
+        return None
+    stored = shard_path(VIDEOS_DIR, video_id, f"{video_id}{os.path.splitext(path)[1].lower()}")
+    return video_id if os.path.normpath(path) == os.path.normpath(stored) else None
+
+
+def _probe_source(video: dict) -> str | None:
+    """The local file to read metadata from: the library file, or the rendition of a remote clip."""
+    if not video.get("url"):
+        return video["file_path"]
+    record = renditions.get_record(video["id"])
+    return record["path"] if record else None
+
+
+def _with_metadata(video: dict) -> dict:
+    source = _probe_source(video)
+    meta   = catalog.get(source) if source else None
+    if source and meta is None:
+        catalog.schedule(source)   # answered from the catalog next time
+    return {
+        **video,
+        "duration":  format_duration(meta["duration"]) if meta else None,
+        "metadata":  meta,
+        "rendition": renditions.get_record(video["id"]),
+    }
+
+
 @router.get("/videos")
 async def list_videos(
     category: str | None = Query(None, description="Filter by categoryId"),
 ):
     """Return available background videos from the library."""
-    videos = VIDEO_LIBRARY
-    if category:
-        videos = [v for v in videos if v["categoryId"] == category]
-
-    videos_out = []
-    for v in videos:
-        # Only ffprobe local files; skip probing if a remote URL is configured
-        duration = probe_duration(v["file_path"]) if not v.get("url") else None
-        videos_out.append({**v, "duration": duration})
+    videos     = _BY_CATEGORY.get(category, []) if category else VIDEO_LIBRARY
+    videos_out = [_with_metadata(v) for v in videos]
 
     return {
         "count":      len(videos_out),
         "videos":     videos_out,
-        "categories": list({v["categoryId"]: v["category"] for v in VIDEO_LIBRARY}.items()),
+        "categories": CATEGORIES,
     }
 
 
 @router.get("/videos/{video_id}")
 async def get_video(video_id: str):
     """Get metadata for a single video by ID."""
-    video = next((v for v in VIDEO_LIBRARY if v["id"] == video_id), None)
+    video = _BY_ID.get(video_id)
     if not video:
         raise HTTPException(status_code=404, detail="Video not found.")
-    return video
+    return _with_metadata(video)
+
+
+@router.post("/videos/{video_id}/prefetch", status_code=202)
+async def prefetch_video(video_id: str):
+    """
+    Warm the cache for a clip as soon as the user picks it, so the download
+    (and ingest) is done by the time /api/generate is posted.
+    """
+    video = _BY_ID.get(video_id)
+    if not video:
+        raise HTTPException(status_code=404, detail="Video not found.")
+    if renditions.get_record(video_id):
+        return {"video_id": video_id, "status": "ready"}
+
+    task = asyncio.create_task(prefetch(video))
+    _prefetching.add(task)
+    task.add_done_callback(lambda t: (_prefetching.discard(t), t.cancelled() or t.exception()))
+    return {"video_id": video_id, "status": "prefetching"}
+
 
+@router.post("/videos/upload", openapi_extra=UPLOAD_FORM_DOC)
+async def upload_video(request: Request):
+    """Upload a custom background video (multipart field `file`)."""
 
-@router.post("/videos/upload")
-async def upload_video(file: UploadFile = File(...)):
-    """Upload a custom background video."""
-    if not file.filename.lower().endswith((".mp4", ".mov", ".webm")):
-        raise HTTPException(status_code=422, detail="Only .mp4, .mov, and .webm files are supported.")
+    def check_filename(name: str):
+        if not name.lower().endswith((".mp4", ".mov", ".webm")):
+            raise InvalidUpload("Only .mp4, .mov, and .webm files are supported.")
 
-    file_id  = str(uuid.uuid4())[:8]
-    ext      = os.path.splitext(file.filename)[1]
-    save_path = os.path.join(VIDEOS_DIR, f"{file_id}{ext}")
+    try:
+        saved = await receive_upload(
+            request, VIDEOS_DIR,
+            max_bytes=MAX_UPLOAD_MB * 1024 * 1024,
+            check_filename=check_filename,
+            check_header=check_video_header,
+        )
+    except UploadTooLarge:
+        raise HTTPException(status_code=413, detail=f"Video exceeds the {MAX_UPLOAD_MB} MB upload limit.")
+    except InvalidUpload as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    file_id   = saved["sha256"][:16]   # same bytes → same id, stored once
+    save_path = saved["path"]
 
-    contents = await file.read()
-    async with aiofiles.open(save_path, "wb") as f:
-        await f.write(contents)
+    # Catalog it and transcode to the canonical 720x1280 rendition, off the request
+    catalog.schedule(save_path)
+    renditions.schedule(save_path, file_id)
 
     return {
         "video_id":  file_id,
-        "filename":  file.filename,
+        "filename":  saved["filename"],
         "file_path": save_path,
-        "size_mb":   round(len(contents) / (1024 * 1024), 2),
+        "size_mb":   round(saved["size"] / (1024 * 1024), 2),
+        "duplicate": saved["duplicate"],
         "message":   "Video uploaded successfully.",
     }
+
+
+async def prefetch(video: dict):
+    """Pull a clip into the asset cache (if remote) and make sure its rendition exists."""
+    if video.get("url"):
+        source = (await asset_cache.fetch(video["url"]))["path"]
+    elif os.path.exists(video.get("file_path", "")):
+        source = video["file_path"]
+    else:
+        return
+    await renditions.ingest_async(source, trusted_id(video))
+
+
+async def ingest_library():
+    """
+    Transcode every library clip into its canonical rendition, one at a time.
+    Remote clips are pulled through the asset cache first. Run at startup.
+    """
+    for v in VIDEO_LIBRARY:
+        try:
+            await prefetch(v)
+        except Exception:
+            # Missing ffmpeg / unreachable origin — jobs fall back to scaling per render
+            continue
+
+
+async def warm_catalog():
+    """Probe library files (and existing renditions) in the background at startup."""
+    paths = [p for v in VIDEO_LIBRARY if (p := _probe_source(v))]
+    await catalog.warm(paths)
@@ -0,0 +1,91 @@
+import asyncio
+import hashlib
+import os
+import time
+
+import aiofiles
+import httpx
+
+from services.disk_cache import DiskCache
+
+# ── Config ────────────────────────────────────────────────────────────────────
+ASSET_CACHE_DIR          = os.getenv("ASSET_CACHE_DIR", "cache/assets")
+ASSET_CACHE_MAX_MB       = int(os.getenv("ASSET_CACHE_MAX_MB", "5000"))
+ASSET_CACHE_REVALIDATE_S = int(os.getenv("ASSET_CACHE_REVALIDATE_S", "300"))
+
+cache = DiskCache(ASSET_CACHE_DIR, ASSET_CACHE_MAX_MB * 1024 * 1024)
+
+# url key → in-flight download shared by every job that missed on the same clip
+_inflight: dict[str, asyncio.Task] = {}
+
+
+def url_key(url: str) -> str:
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()[:32]
+
+
+def _version(url: str, etag: str | None, last_modified: str | None) -> str:
+    raw = f"{url}\0{etag or ''}\0{last_modified or ''}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+async def _download(url: str, key: str) -> dict:
+    """Fetch `url`, revalidating an existing entry with ETag / Last-Modified."""
+    entry   = cache.get(key, count=False)
+    headers = {}
+    if entry:
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+    tmp = cache.tmp_path(key)
+    try:
+        async with httpx.AsyncClient(timeout=300.0, follow_redirects=True) as client:
+            async with client.stream("GET", url, headers=headers) as resp:
+                if resp.status_code == 304 and entry:
+                    return cache.update(key, validated_at=time.time()) or entry
+                resp.raise_for_status()
+                async with aiofiles.open(tmp, "wb") as f:
+                    async for chunk in resp.aiter_bytes(chunk_size=1024 * 1024):
+                        await f.write(chunk)
+                etag          = resp.headers.get("ETag")
+                last_modified = resp.headers.get("Last-Modified")
+    except httpx.HTTPError:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        # Origin unreachable — a stale copy beats failing the job
+        if entry:
+            return entry
+        raise
+
+    version = _version(url, etag, last_modified)
+    ext     = os.path.splitext(url.split("?", 1)[0])[1] or ".mp4"
+    return cache.put(
+        key, tmp, f"{key}.{version}{ext}",
+        url=url,
+        etag=etag,
+        last_modified=last_modified,
+        version=version,
+        validated_at=time.time(),
+    )
+
+
+async def fetch(url: str) -> dict:
+    """
+    Return the cache entry for `url`, downloading or revalidating it when needed.
+    Concurrent callers that miss on the same URL share one download.
+    """
+    key   = url_key(url)
+    entry = cache.get(key)
+    if entry and time.time() - entry.get("validated_at", 0) < ASSET_CACHE_REVALIDATE_S:
+        return entry
+
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.create_task(_download(url, key))
+        _inflight[key] = task
+        task.add_done_callback(lambda t: (_inflight.pop(key, None), t.cancelled() or t.exception()))
+    return await asyncio.shield(task)
+
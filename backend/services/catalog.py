@@ -0,0 +1,166 @@
+import asyncio
+import json
+import os
+import sqlite3
+import subprocess
+import threading
+
+from services.metrics import ffprobe_seconds
+
+# ── Config ────────────────────────────────────────────────────────────────────
+CATALOG_PATH = os.getenv("CATALOG_PATH", "data/catalog.db")
+
+
+def probe_media(file_path: str) -> dict:
+    """Run ffprobe once and pull out everything the API and renderer care about. Blocking."""
+    result = subprocess.run(
+        [
+            "ffprobe", "-v", "quiet",
+            "-print_format", "json",
+            "-show_format", "-show_streams",
+            "-select_streams", "v:0",
+            file_path,
+        ],
+        capture_output=True, text=True, timeout=30, check=True,
+    )
+    data   = json.loads(result.stdout)
+    fmt    = data.get("format", {})
+    stream = (data.get("streams") or [{}])[0]
+
+    fps = None
+    num, _, den = stream.get("avg_frame_rate", "0/0").partition("/")
+    if den and float(den):
+        fps = round(float(num) / float(den), 3)
+
+    return {
+        "duration":  float(fmt["duration"]) if fmt.get("duration") else None,
+        "width":     stream.get("width"),
+        "height":    stream.get("height"),
+        "codec":     stream.get("codec_name"),
+        "fps":       fps,
+        "keyframe_interval": _probe_keyframe_interval(file_path),
+        "size":      os.path.getsize(file_path),
+    }
+
+
+def _probe_keyframe_interval(file_path: str) -> float | None:
+    """Average seconds between keyframes over the first 30s of the clip."""
+    try:
+        result = subprocess.run(
+            [
+                "ffprobe", "-v", "quiet",
+                "-select_streams", "v:0",
+                "-skip_frame", "nokey",
+                "-read_intervals", "%+30",
+                "-show_entries", "frame=pts_time",
+                "-of", "csv=p=0",
+                file_path,
+            ],
+            capture_output=True, text=True, timeout=30,
+        )
+        times = [float(t.strip(",")) for t in result.stdout.split() if t.strip(",")]
+    except Exception:
+        return None
+    if len(times) < 2:
+        return None
+    return round((times[-1] - times[0]) / (len(times) - 1), 3)
+
+
+class VideoCatalog:
+    """
+    Probe results for video files, stored in SQLite and keyed by path.
+
+    An entry is only trusted while the file's size and mtime still match, so
+    replacing a file re-probes it. Probing always happens off the event loop.
+    """
+
+    def __init__(self, path: str):
+        self.path   = path
+        self._local = threading.local()
+        self._inflight: dict[str, asyncio.Task] = {}
+        self._failed: set[tuple] = set()   # (path, size, mtime_ns) ffprobe couldn't read
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS videos (
+                path     TEXT PRIMARY KEY,
+                size     INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                meta     TEXT    NOT NULL
+            )
+        """)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    def get(self, file_path: str) -> dict | None:
+        """Stored metadata for `file_path`, or None if never probed or the file has changed."""
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            return None
+        row = self._conn().execute(
+            "SELECT size, mtime_ns, meta FROM videos WHERE path = ?", (os.path.abspath(file_path),)
+        ).fetchone()
+        if row is None or row[0] != st.st_size or row[1] != st.st_mtime_ns:
+            return None
+        return json.loads(row[2])
+
+    def probe(self, file_path: str) -> dict:
+        """Probe `file_path` and store the result. Blocking."""
+        st   = os.stat(file_path)
+        with ffprobe_seconds.time(kind="catalog"):
+            meta = probe_media(file_path)
+        self._conn().execute(
+            "INSERT OR REPLACE INTO videos (path, size, mtime_ns, meta) VALUES (?, ?, ?, ?)",
+            (os.path.abspath(file_path), st.st_size, st.st_mtime_ns, json.dumps(meta)),
+        )
+        return meta
+
+    async def ensure(self, file_path: str) -> dict:
+        """Return metadata, probing in a thread on a miss. Concurrent misses share one probe."""
+        meta = self.get(file_path)
+        if meta is not None:
+            return meta
+        key  = os.path.abspath(file_path)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(asyncio.to_thread(self.probe, file_path))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _t: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    def schedule(self, file_path: str):
+        """Probe in the background; callers that can't wait just see no metadata yet."""
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            return
+        signature = (os.path.abspath(file_path), st.st_size, st.st_mtime_ns)
+        if signature in self._failed or self.get(file_path) is not None:
+            return
+
+        def done(t: asyncio.Task):
+            if not t.cancelled() and t.exception() is not None:
+                self._failed.add(signature)   # don't re-run a failing probe on every request
+
+        asyncio.ensure_future(self.ensure(file_path)).add_done_callback(done)
+
+    async def warm(self, paths: list[str]):
+        """Probe every existing file that isn't catalogued yet, one at a time."""
+        for p in paths:
+            if os.path.exists(p):
+                try:
+                    await self.ensure(p)
+                except Exception:
+                    continue
+
+
+catalog = VideoCatalog(CATALOG_PATH)
@@ -0,0 +1,193 @@
+import json
+import os
+import threading
+import time
+from collections import Counter
+
+try:
+    import fcntl
+except ImportError:   # Windows: checkouts are then only seen by this process
+    fcntl = None
+
+
+class DiskCache:
+    """
+    Size-bounded on-disk cache with LRU eviction.
+
+    Every entry is a blob file plus a `{key}.json` sidecar holding its metadata,
+    so several processes can share one cache directory without a central index.
+    Blobs that are pinned or checked out (in use by a running job) are never
+    evicted; a checkout also holds a shared `flock` on the blob, so eviction in
+    another process sharing the directory skips it too.
+
+    Coalescing is per process: callers here share one download / synthesis,
+    but two processes missing on the same key both produce it and the last
+    `put` wins — wasted work, never a corrupt entry, as blobs land by rename.
+    """
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root      = root
+        self.max_bytes = max_bytes
+        self.stats     = {"hits": 0, "misses": 0, "evictions": 0}
+        self._in_use: Counter[str] = Counter()
+        self._locks:  dict[str, int] = {}   # path → fd holding the shared lock
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    # ── Paths ────────────────────────────────────────────────────────────────
+    def _meta_path(self, key: str) -> str:
+        return os.path.join(self.root, f"{key}.json")
+
+    def tmp_path(self, key: str) -> str:
+        """A unique scratch path inside the cache dir (same filesystem as the blobs)."""
+        return os.path.join(self.root, f".{key}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+    # ── Metadata ─────────────────────────────────────────────────────────────
+    def _read_meta(self, key: str) -> dict | None:
+        try:
+            with open(self._meta_path(key), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not os.path.exists(meta.get("path", "")):
+            return None
+        return meta
+
+    def _write_meta(self, key: str, meta: dict):
+        tmp = self._meta_path(key) + f".{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, self._meta_path(key))
+
+    # ── Public API ───────────────────────────────────────────────────────────
+    def get(self, key: str, count: bool = True) -> dict | None:
+        """Return entry metadata (with "path") and mark it recently used, or None."""
+        meta = self._read_meta(key)
+        if count:
+            self.stats["hits" if meta else "misses"] += 1
+        if meta:
+            meta["last_used"] = time.time()
+            self._write_meta(key, meta)
+        return meta
+
+    def update(self, key: str, **fields) -> dict | None:
+        meta = self._read_meta(key)
+        if meta:
+            meta.update(fields)
+            self._write_meta(key, meta)
+        return meta
+
+    def put(self, key: str, src_path: str, filename: str, **fields) -> dict:
+        """Move `src_path` into the cache as `filename` and record it under `key`."""
+        old  = self._read_meta(key)
+        dest = os.path.join(self.root, filename)
+        os.replace(src_path, dest)
+
+        now  = time.time()
+        meta = {
+            "key":       key,
+            "path":      dest,
+            "size":      os.path.getsize(dest),
+            "created":   now,
+            "last_used": now,
+            "pinned":    bool(old and old.get("pinned")),
+            **fields,
+        }
+        self._write_meta(key, meta)
+
+        # The previous blob is left for evict() to sweep if a job still has it open
+        if old and old["path"] != dest and not self._busy(old["path"]):
+            _remove(old["path"])
+
+        self.evict()
+        return meta
+
+    def pin(self, key: str, pinned: bool = True) -> dict | None:
+        return self.update(key, pinned=pinned)
+
+    def remove(self, key: str):
+        meta = self._read_meta(key)
+        _remove(self._meta_path(key))
+        if meta and not self._busy(meta["path"]):
+            _remove(meta["path"])
+
+    def acquire(self, path: str):
+        with self._lock:
+            self._in_use[path] += 1
+            if self._in_use[path] == 1 and fcntl:
+                try:
+                    fd = os.open(path, os.O_RDONLY)
+                    fcntl.flock(fd, fcntl.LOCK_SH)
+                    self._locks[path] = fd
+                except OSError:
+                    pass   # already gone; the caller finds out when it reads
+
+    def release(self, path: str):
+        with self._lock:
+            self._in_use[path] -= 1
+            if self._in_use[path] <= 0:
+                del self._in_use[path]
+                fd = self._locks.pop(path, None)
+                if fd is not None:
+                    os.close(fd)   # drops the lock
+
+    def _busy(self, path: str) -> bool:
+        """Checked out here, or (going by its lock) by another process sharing the directory."""
+        if self._in_use[path]:
+            return True
+        if not fcntl:
+            return False
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            return False
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return False
+        except OSError:
+            return True
+        finally:
+            os.close(fd)
+
+    def entries(self) -> list[dict]:
+        out = []
+        for name in os.listdir(self.root):
+            if name.endswith(".json"):
+                meta = self._read_meta(name[:-5])
+                if meta:
+                    out.append(meta)
+        return out
+
+    def total_bytes(self) -> int:
+        return sum(e["size"] for e in self.entries())
+
+    def evict(self):
+        """Drop orphaned blobs, then least-recently-used entries until under max_bytes."""
+        with self._lock:
+            entries = self.entries()
+            live    = {e["path"] for e in entries}
+
+            for name in os.listdir(self.root):
+                path = os.path.join(self.root, name)
+                if name.endswith(".json") or name.startswith(".") or path in live:
+                    continue
+                if not self._busy(path):
+                    _remove(path)
+
+            total = sum(e["size"] for e in entries)
+            for e in sorted(entries, key=lambda e: e["last_used"]):
+                if total <= self.max_bytes:
+                    break
+                if e.get("pinned") or self._busy(e["path"]):
+                    continue
+                _remove(self._meta_path(e["key"]))
+                _remove(e["path"])
+                total -= e["size"]
+                self.stats["evictions"] += 1
+
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
@@ -0,0 +1,51 @@
+import asyncio
+
+from services.job_store import job_store
+
+# job_id → futures of SSE streams waiting for that job to change in this process
+_waiters: dict[str, set[asyncio.Future]] = {}
+_loop: asyncio.AbstractEventLoop | None = None
+
+
+def _wake(job_id: str):
+    for fut in _waiters.get(job_id, ()):
+        if not fut.done():
+            fut.set_result(None)
+
+
+def _on_change(job_id: str):
+    # Called by the store from the event loop or from ffmpeg / TTS worker threads
+    if _loop is None or job_id not in _waiters:
+        return
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is _loop:
+        _wake(job_id)
+    else:
+        _loop.call_soon_threadsafe(_wake, job_id)
+
+
+async def wait_for_change(job_id: str, timeout: float):
+    """
+    Return when `job_id` changes in this process, or after `timeout` seconds.
+    The timeout doubles as the fallback for updates written by other worker processes.
+    """
+    global _loop
+    _loop = asyncio.get_running_loop()
+    fut = _loop.create_future()
+    _waiters.setdefault(job_id, set()).add(fut)
+    try:
+        await asyncio.wait_for(fut, timeout)
+    except asyncio.TimeoutError:
+        pass
+    finally:
+        waiters = _waiters.get(job_id)
+        if waiters is not None:
+            waiters.discard(fut)
+            if not waiters:
+                del _waiters[job_id]
+
+
+job_store.listeners.append(_on_change)
@@ -0,0 +1,374 @@
+from abc import ABC, abstractmethod
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# ── Config ────────────────────────────────────────────────────────────────────
+JOB_STORE      = os.getenv("JOB_STORE", "sqlite")
+JOB_STORE_PATH = os.getenv("JOB_STORE_PATH", "data/jobs.db")
+JOB_TTL_S      = int(os.getenv("JOB_TTL_S", str(24 * 3600)))   # finished jobs are kept this long
+
+# Columns with their own field; anything else a job reports lives in the JSON `data` blob
+_COLUMNS = (
+    "status", "progress", "step", "output", "error", "priority", "worker", "heartbeat", "finished",
+    "render_key",
+)
+_FINISHED = ("done", "error")
+
+
+class JobStore(ABC):
+    """
+    Interface every job store backend implements.
+
+    A job is a dict with at least job_id, status, progress, step, output and
+    error. `payload` holds the request (story / video / voice) so a job can be
+    re-run by any worker process after a restart.
+
+    `listeners` are called with a job_id whenever that job changes in this
+    process (from any thread), so waiters can react without polling.
+    """
+
+    def __init__(self):
+        self.listeners: list = []
+
+    def _changed(self, job_id: str):
+        for fn in self.listeners:
+            fn(job_id)
+
+    @abstractmethod
+    def create(self, job_id: str, payload: dict, priority: int = 0, **fields) -> dict:
+        ...
+
+    @abstractmethod
+    def get(self, job_id: str) -> dict | None:
+        ...
+
+    @abstractmethod
+    def get_payload(self, job_id: str) -> dict | None:
+        ...
+
+    @abstractmethod
+    def update(self, job_id: str, **fields) -> bool:
+        """Atomically apply `fields` to a job. Returns False if the job no longer exists."""
+
+    @abstractmethod
+    def increment(self, job_id: str, field: str, by: int = 1) -> int | None:
+        """Atomically add `by` to a counter field (absent counts as 1); returns the new value, None if no job."""
+
+    @abstractmethod
+    def delete(self, job_id: str) -> bool:
+        ...
+
+    @abstractmethod
+    def list_by_status(self, status: str) -> list[dict]:
+        ...
+
+    @abstractmethod
+    def find_by_render_key(self, render_key: str) -> dict | None:
+        """The job that produces (or produced) this exact render: a finished one first, else one in flight."""
+
+    @abstractmethod
+    def count(self, status: str) -> int:
+        ...
+
+    @abstractmethod
+    def position(self, job_id: str) -> int | None:
+        """Number of queued jobs that will be claimed before `job_id`."""
+
+    @abstractmethod
+    def claim_next(self, worker: str) -> dict | None:
+        """Atomically move the next queued job to "processing" for `worker`."""
+
+    @abstractmethod
+    def heartbeat(self, worker: str, job_ids: list[str]):
+        ...
+
+    @abstractmethod
+    def requeue_stale(self, stale_after: float) -> list[str]:
+        """Put "processing" jobs whose worker stopped heartbeating back in the queue."""
+
+    @abstractmethod
+    def expire(self, ttl: float) -> list[str]:
+        """Delete finished jobs (and batches) older than `ttl` seconds; returns the job ids."""
+
+    # A batch is just an ordered list of job ids; its progress is derived from the jobs
+    @abstractmethod
+    def create_batch(self, batch_id: str, job_ids: list[str], **fields) -> dict:
+        ...
+
+    @abstractmethod
+    def get_batch(self, batch_id: str) -> dict | None:
+        ...
+
+    @abstractmethod
+    def delete_batch(self, batch_id: str) -> bool:
+        ...
+
+
+class SQLiteJobStore(JobStore):
+    """
+    Job store on a single SQLite file in WAL mode.
+
+    Every uvicorn worker process opens the same file; writes that must not race
+    (claiming a job, merging progress fields) run inside BEGIN IMMEDIATE.
+    """
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path   = path
+        self._local = threading.local()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        columns = {r["name"] for r in conn.execute("PRAGMA table_info(jobs)")}
+        if columns and "render_key" not in columns:
+            conn.execute("ALTER TABLE jobs ADD COLUMN render_key TEXT")   # stores created before render dedupe
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id    TEXT PRIMARY KEY,
+                status    TEXT    NOT NULL,
+                progress  INTEGER NOT NULL DEFAULT 0,
+                step      TEXT    NOT NULL DEFAULT 'Queued',
+                output    TEXT,
+                error     TEXT,
+                priority  INTEGER NOT NULL DEFAULT 0,
+                payload   TEXT    NOT NULL,
+                data      TEXT    NOT NULL DEFAULT '{}',
+                worker    TEXT,
+                heartbeat REAL,
+                created   REAL    NOT NULL,
+                updated   REAL    NOT NULL,
+                finished  REAL,
+                render_key TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_jobs_queue  ON jobs (status, priority DESC, created);
+            CREATE INDEX IF NOT EXISTS idx_jobs_worker ON jobs (status, heartbeat);
+            CREATE INDEX IF NOT EXISTS idx_jobs_render ON jobs (render_key);
+            CREATE TABLE IF NOT EXISTS batches (
+                batch_id TEXT PRIMARY KEY,
+                job_ids  TEXT NOT NULL,
+                data     TEXT NOT NULL DEFAULT '{}',
+                created  REAL NOT NULL
+            );
+        """)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA busy_timeout=30000")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _to_job(row: sqlite3.Row) -> dict:
+        return {
+            **json.loads(row["data"]),
+            "job_id":   row["job_id"],
+            "status":   row["status"],
+            "progress": row["progress"],
+            "step":     row["step"],
+            "output":   row["output"],
+            "error":    row["error"],
+            "priority": row["priority"],
+            "render_key": row["render_key"],
+            "created":  row["created"],
+        }
+
+    # ── CRUD ─────────────────────────────────────────────────────────────────
+    def create(self, job_id: str, payload: dict, priority: int = 0, **fields) -> dict:
+        now        = time.time()
+        render_key = fields.pop("render_key", None)
+        self._conn().execute(
+            "INSERT INTO jobs (job_id, status, priority, payload, data, created, updated, render_key) "
+            "VALUES (?, 'queued', ?, ?, ?, ?, ?, ?)",
+            (job_id, priority, json.dumps(payload), json.dumps(fields), now, now, render_key),
+        )
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> dict | None:
+        row = self._conn().execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return self._to_job(row) if row else None
+
+    def get_payload(self, job_id: str) -> dict | None:
+        row = self._conn().execute("SELECT payload FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return json.loads(row["payload"]) if row else None
+
+    def update(self, job_id: str, **fields) -> bool:
+        columns = {k: v for k, v in fields.items() if k in _COLUMNS}
+        extra   = {k: v for k, v in fields.items() if k not in _COLUMNS}
+        if columns.get("status") in _FINISHED:
+            columns.setdefault("finished", time.time())
+
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT data FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+            if row is None:
+                conn.execute("ROLLBACK")
+                return False
+            assignments = [f"{k} = ?" for k in columns] + ["updated = ?"]
+            values      = list(columns.values()) + [time.time()]
+            if extra:
+                assignments.append("data = ?")
+                values.append(json.dumps({**json.loads(row["data"]), **extra}))
+            conn.execute(f"UPDATE jobs SET {', '.join(assignments)} WHERE job_id = ?", (*values, job_id))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self._changed(job_id)
+        return True
+
+    def increment(self, job_id: str, field: str, by: int = 1) -> int | None:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT data FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+            if row is None:
+                conn.execute("ROLLBACK")
+                return None
+            data        = json.loads(row["data"])
+            data[field] = data.get(field, 1) + by
+            conn.execute(
+                "UPDATE jobs SET data = ?, updated = ? WHERE job_id = ?", (json.dumps(data), time.time(), job_id),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self._changed(job_id)
+        return data[field]
+
+    def delete(self, job_id: str) -> bool:
+        cur = self._conn().execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+        self._changed(job_id)
+        return cur.rowcount > 0
+
+    def list_by_status(self, status: str) -> list[dict]:
+        rows = self._conn().execute(
+            "SELECT * FROM jobs WHERE status = ? ORDER BY priority DESC, created", (status,)
+        ).fetchall()
+        return [self._to_job(r) for r in rows]
+
+    def find_by_render_key(self, render_key: str) -> dict | None:
+        row = self._conn().execute(
+            "SELECT * FROM jobs WHERE render_key = ? AND status IN ('queued', 'processing', 'done') "
+            "ORDER BY status = 'done' DESC, created DESC LIMIT 1",
+            (render_key,),
+        ).fetchone()
+        return self._to_job(row) if row else None
+
+    def count(self, status: str) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (status,)).fetchone()[0]
+
+    def position(self, job_id: str) -> int | None:
+        row = self._conn().execute(
+            "SELECT priority, created FROM jobs WHERE job_id = ? AND status = 'queued'", (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return self._conn().execute(
+            "SELECT COUNT(*) FROM jobs WHERE status = 'queued' "
+            "AND (priority > ? OR (priority = ? AND created < ?))",
+            (row["priority"], row["priority"], row["created"]),
+        ).fetchone()[0]
+
+    # ── Workers ──────────────────────────────────────────────────────────────
+    def claim_next(self, worker: str) -> dict | None:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT job_id FROM jobs WHERE status = 'queued' ORDER BY priority DESC, created LIMIT 1"
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            now = time.time()
+            conn.execute(
+                "UPDATE jobs SET status = 'processing', worker = ?, heartbeat = ?, updated = ? WHERE job_id = ?",
+                (worker, now, now, row["job_id"]),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self._changed(row["job_id"])
+        return self.get(row["job_id"])
+
+    def heartbeat(self, worker: str, job_ids: list[str]):
+        if not job_ids:
+            return
+        marks = ", ".join("?" for _ in job_ids)
+        self._conn().execute(
+            f"UPDATE jobs SET heartbeat = ? WHERE worker = ? AND job_id IN ({marks})",
+            (time.time(), worker, *job_ids),
+        )
+
+    def requeue_stale(self, stale_after: float) -> list[str]:
+        cutoff = time.time() - stale_after
+        conn   = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            ids = [r["job_id"] for r in conn.execute(
+                "SELECT job_id FROM jobs WHERE status = 'processing' AND heartbeat < ?", (cutoff,)
+            )]
+            conn.executemany(
+                "UPDATE jobs SET status = 'queued', progress = 0, step = 'Requeued', worker = NULL "
+                "WHERE job_id = ?",
+                [(i,) for i in ids],
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return ids
+
+    def expire(self, ttl: float) -> list[str]:
+        cutoff = time.time() - ttl
+        conn   = self._conn()
+        ids = [r["job_id"] for r in conn.execute(
+            "SELECT job_id FROM jobs WHERE status IN ('done', 'error') AND finished < ?", (cutoff,)
+        )]
+        conn.executemany("DELETE FROM jobs WHERE job_id = ?", [(i,) for i in ids])
+        conn.execute("DELETE FROM batches WHERE created < ?", (cutoff,))
+        return ids
+
+    # ── Batches ──────────────────────────────────────────────────────────────
+    def create_batch(self, batch_id: str, job_ids: list[str], **fields) -> dict:
+        self._conn().execute(
+            "INSERT INTO batches (batch_id, job_ids, data, created) VALUES (?, ?, ?, ?)",
+            (batch_id, json.dumps(job_ids), json.dumps(fields), time.time()),
+        )
+        return self.get_batch(batch_id)
+
+    def get_batch(self, batch_id: str) -> dict | None:
+        row = self._conn().execute("SELECT * FROM batches WHERE batch_id = ?", (batch_id,)).fetchone()
+        if row is None:
+            return None
+        return {
+            **json.loads(row["data"]),
+            "batch_id": row["batch_id"],
+            "job_ids":  json.loads(row["job_ids"]),
+            "created":  row["created"],
+        }
+
+    def delete_batch(self, batch_id: str) -> bool:
+        cur = self._conn().execute("DELETE FROM batches WHERE batch_id = ?", (batch_id,))
+        return cur.rowcount > 0
+
+
+def open_store() -> JobStore:
+    if JOB_STORE == "sqlite":
+        return SQLiteJobStore(JOB_STORE_PATH)
+    raise ValueError(f"Unknown JOB_STORE: {JOB_STORE}")
+
+
+job_store = open_store()
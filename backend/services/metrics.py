@@ -0,0 +1,159 @@
+import threading
+import time
+from contextlib import contextmanager
+
+# Seconds; covers a fast ffprobe (tens of ms) up to a long render (tens of minutes)
+DEFAULT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+
+
+def _labels(names: tuple, values: tuple, extra: dict | None = None) -> str:
+    pairs = list(zip(names, values)) + list((extra or {}).items())
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def _num(value: float) -> str:
+    return "+Inf" if value == float("inf") else repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name, self.help, self.labelnames = name, help, labels
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(str(labels[n]) for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(tuple(str(labels[n]) for n in self.labelnames), 0)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labelnames, key)} {_num(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name, self.help, self.labelnames = name, help, labels
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._series: dict[tuple, dict] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels[n]) for n in self.labelnames)
+        with self._lock:
+            series = self._series.setdefault(key, {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0})
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["counts"][i] += 1
+            series["sum"]   += value
+            series["count"] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe how long the `with` block took (also when it raises)."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                for bound, count in zip(self.buckets, series["counts"]):
+                    lines.append(
+                        f"{self.name}_bucket{_labels(self.labelnames, key, {'le': _num(bound)})} {count}"
+                    )
+                lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_num(series['sum'])}")
+                lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {series['count']}")
+        return lines
+
+
+class Gauge:
+    """
+    Read at scrape time from `fn()` — a number, or a {label value: number} dict
+    for one label. `kind="counter"` exposes a count kept elsewhere (cache stats).
+    """
+
+    def __init__(self, name: str, help: str, fn, label: str | None = None, kind: str = "gauge"):
+        self.name, self.help, self.fn, self.label, self.kind = name, help, fn, label, kind
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        value = self.fn()
+        if isinstance(value, dict):
+            for k, v in sorted(value.items()):
+                if v is not None:
+                    lines.append(f"{self.name}{_labels((self.label,), (k,))} {_num(v)}")
+        elif value is not None:
+            lines.append(f"{self.name} {_num(value)}")
+        return lines
+
+
+class Registry:
+    """
+    Minimal Prometheus text-format registry (no client library needed).
+    Values are per process: with several uvicorn workers, scrape each one.
+    """
+
+    def __init__(self):
+        self._metrics: list = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help: str, labels: tuple = ()) -> Counter:
+        return self.register(Counter(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labels, buckets))
+
+    def gauge(self, name: str, help: str, fn, label: str | None = None, kind: str = "gauge") -> Gauge:
+        return self.register(Gauge(name, help, fn, label, kind))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            try:
+                lines += metric.render()
+            except Exception:
+                continue   # one broken gauge shouldn't take the whole scrape down
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# ── Instruments shared across modules ─────────────────────────────────────────
+stage_seconds = registry.histogram(
+    "storyscroll_stage_seconds", "Time spent in each generation pipeline stage.", ("stage",),
+)
+job_seconds = registry.histogram(
+    "storyscroll_job_seconds", "Time from a job starting to run until it finished.", ("status",),
+)
+queue_wait_seconds = registry.histogram(
+    "storyscroll_queue_wait_seconds", "Time jobs spent queued before a worker picked them up.",
+)
+jobs_finished = registry.counter(
+    "storyscroll_jobs_finished_total", "Generation jobs that finished, by outcome.", ("status",),
+)
+reddit_upstream_seconds = registry.histogram(
+    "storyscroll_reddit_upstream_seconds", "Latency of upstream Reddit listing calls.", ("outcome",),
+)
+reddit_cache_requests = registry.counter(
+    "storyscroll_reddit_cache_requests_total", "Reddit listing lookups by cache result.", ("result",),
+)
+ffprobe_seconds = registry.histogram(
+    "storyscroll_ffprobe_seconds", "Time spent in ffprobe calls.", ("kind",),
+)
@@ -0,0 +1,210 @@
+import json
+import os
+import re
+
+# ── Config ────────────────────────────────────────────────────────────────────
+# Extra rule packs (JSON files, comma-separated) layered over the built-in one; later packs win
+NORMALIZE_RULES = os.getenv("NORMALIZE_RULES", "")
+
+# A "token" is what word rules are looked up by: letters/digits, optionally
+# joined by ; ' & . (so "TL;DR", "don't" are single tokens). Not by / — "AITA/WIBTA"
+# is two tokens; "w/o" and "b/c" are patterns
+TOKEN = r"\w+(?:[;'&.]\w+)*"
+_TOKEN = re.compile(TOKEN)
+
+# Rule pack format — every section is optional:
+#   "words":    {"AITA": "Am I the asshole"}     token → text, any case
+#   "exact":    {"SO": "significant other"}      token → text, this case only
+#   "patterns": [{"pattern": "...", "replace": "\\1 ...", "ignore_case": false, "inner": false}]
+# Word rules also cover the possessive ("MIL's"). Patterns run before word
+# lookups and are tried in order; `replace` may use \1, and with `inner` the
+# replacement is normalized again (markdown). Patterns are combined into one
+# regex, so they can't use backreferences or named groups.
+DEFAULT_RULES = {
+    "words": {
+        "TIFU":  "Today I fucked up",
+        "AITA":  "Am I the asshole",
+        "AITAH": "Am I the asshole",
+        "WIBTA": "Would I be the asshole",
+        "NTA":   "Not the asshole",
+        "YTA":   "You're the asshole",
+        "ESH":   "Everyone sucks here",
+        "TL;DR": "Too long, didn't read",
+        "TLDR":  "Too long, didn't read",
+        "BF":    "boyfriend",
+        "GF":    "girlfriend",
+        "BFF":   "best friend",
+        "LDR":   "long distance relationship",
+        "IMO":   "in my opinion",
+        "IMHO":  "in my humble opinion",
+        "IIRC":  "if I remember correctly",
+        "AFAIK": "as far as I know",
+        "FWIW":  "for what it's worth",
+        "IRL":   "in real life",
+        "TBH":   "to be honest",
+        "TBF":   "to be fair",
+        "NGL":   "not gonna lie",
+        "IDK":   "I don't know",
+        "IKR":   "I know, right",
+        "PSA":   "P S A",
+        "FYI":   "for your information",
+        "BTW":   "by the way",
+        "OMG":   "oh my god",
+        "WTF":   "what the fuck",
+        "LOL":   "L O L",
+        "LMAO":  "L M A O",
+        "SMH":   "shaking my head",
+        "ppl":   "people",
+        "yrs":   "years",
+        "hrs":   "hours",
+        "mins":  "minutes",
+        "approx": "approximately",
+        "vs":    "versus",
+        "etc":   "etcetera",
+    },
+    # Forms that mean something else in another case ("nah", "op", "400 BC", "an RN", "2 mil")
+    "exact": {
+        "bc":  "because",
+        "rn":  "right now",
+        "TW":  "Trigger warning",
+        "CW":  "Content warning",
+        "MIL": "mother-in-law",
+        "FIL": "father-in-law",
+        "SIL": "sister-in-law",
+        "BIL": "brother-in-law",
+        "DIL": "daughter-in-law",
+        "NAH": "No assholes here",
+        "INFO": "More info needed",
+        "ETA": "Edited to add",
+        "OP":  "O P",
+        "DH":  "husband",
+        "DW":  "wife",
+        "DS":  "son",
+        "DD":  "daughter",
+        "NC":  "no contact",
+        "LC":  "low contact",
+        "WFH": "work from home",
+    },
+    "patterns": [
+        # Markdown: link text only, then emphasis / strike / code, headings and quotes
+        {"pattern": r"\[([^\]\n]+)\]\([^)\s]+\)", "replace": r"\1", "inner": True},
+        {"pattern": r"\*\*(?=\S)(.+?)(?<=\S)\*\*", "replace": r"\1", "inner": True},
+        {"pattern": r"(?<!\w)__(?=\S)(.+?)(?<=\S)__(?!\w)", "replace": r"\1", "inner": True},
+        {"pattern": r"~~(?=\S)(.+?)(?<=\S)~~", "replace": r"\1", "inner": True},
+        {"pattern": r"(?<![\w*])\*(?=\S)([^*\n]+?)(?<=\S)\*(?![\w*])", "replace": r"\1", "inner": True},
+        {"pattern": r"`([^`\n]+)`", "replace": r"\1", "inner": True},
+        {"pattern": r"^[ \t]*(?:#{1,6}|>+)[ \t]+", "replace": ""},
+        # Bare links aren't worth reading out
+        {"pattern": r"\b(?:https?://|www\.)\S+", "replace": "a link"},
+        {"pattern": r"(?<![\w/])/?r/(\w+)", "replace": r"r slash \1"},
+        {"pattern": r"(?<![\w/])/?u/([\w-]+)", "replace": r"u slash \1"},
+        {"pattern": r"(?<!\w)w/(?=\s)", "replace": "with", "ignore_case": True},
+        {"pattern": r"(?<!\w)w/o(?!\w)", "replace": "without", "ignore_case": True},
+        {"pattern": r"(?<!\w)b/c(?!\w)", "replace": "because", "ignore_case": True},
+        # Only in context: "my SO" (not "I was SO mad"), "you're the AH" (not "AH!")
+        {"pattern": r"\b((?i:my|his|her|their|your|our))\s+SO(?=\W|$)('s)?", "replace": r"\1 significant other\2"},
+        {"pattern": r"\b((?i:the|an|an absolute|such an|being an?))\s+AH(?=\W|$)('s)?", "replace": r"\1 asshole\2"},
+        # Age/gender tags, only in brackets — "(29F)", "[17f]", "(M 31)" — so "95F outside",
+        # "15m", "F1" and "M16" are left alone
+        {"pattern": r"([(\[])\s*(\d{1,2}) ?[Ff]\s*([)\]])", "replace": r"\1\2 year old female\3"},
+        {"pattern": r"([(\[])\s*(\d{1,2}) ?[Mm]\s*([)\]])", "replace": r"\1\2 year old male\3"},
+        {"pattern": r"([(\[])\s*(\d{1,2}) ?(?:NB|nb|enby)\s*([)\]])", "replace": r"\1\2 year old nonbinary person\3"},
+        {"pattern": r"([(\[])\s*[Ff] ?(\d{1,2})\s*([)\]])", "replace": r"\1female, \2\3"},
+        {"pattern": r"([(\[])\s*[Mm] ?(\d{1,2})\s*([)\]])", "replace": r"\1male, \2\3"},
+        {"pattern": r"&amp;", "replace": "and"},
+        {"pattern": r"&nbsp;|&#x200B;", "replace": " "},
+    ],
+}
+
+
+class Normalizer:
+    """
+    Rewrites story text for TTS in one left-to-right pass.
+
+    Every pattern plus a generic token matcher is compiled into a single
+    alternation. At each position the patterns are tried in pack order; failing
+    those a whole token is consumed and looked up in the word tables, so the
+    cost is one scan of the text plus a dict lookup per token, no matter how
+    many word rules are loaded.
+    """
+
+    def __init__(self, packs: list[dict]):
+        self.words:    dict[str, str] = {}
+        self.exact:    dict[str, str] = {}
+        self.patterns: list[dict]     = []
+        for pack in packs:
+            self._add(pack)
+
+        alternatives = [
+            f"(?P<p{i}>{'(?i:' if rule['ignore_case'] else '(?:'}{rule['pattern']}))"
+            for i, rule in enumerate(self.patterns)
+        ]
+        try:
+            self._regex = re.compile("|".join([*alternatives, f"(?P<token>{TOKEN})"]), re.MULTILINE)
+        except re.error as e:
+            raise ValueError(f"Normalization patterns don't combine: {e}")
+
+    def _add(self, pack: dict):
+        for section in ("words", "exact"):
+            table = self.words if section == "words" else self.exact
+            for key, replacement in (pack.get(section) or {}).items():
+                if not _TOKEN.fullmatch(key):
+                    raise ValueError(f"Rule key {key!r} is not a single token; use a pattern instead.")
+                table[key.lower() if section == "words" else key] = str(replacement)
+
+        for rule in pack.get("patterns") or []:
+            ignore_case = bool(rule.get("ignore_case"))
+            try:
+                compiled = re.compile(rule["pattern"], re.MULTILINE | (re.IGNORECASE if ignore_case else 0))
+            except (KeyError, re.error) as e:
+                raise ValueError(f"Bad normalization pattern {rule!r}: {e}")
+            if compiled.match(""):
+                raise ValueError(f"Normalization pattern {rule['pattern']!r} matches empty text.")
+            self.patterns.append({
+                "pattern":     rule["pattern"],
+                "replace":     rule.get("replace", ""),
+                "ignore_case": ignore_case,
+                "inner":       bool(rule.get("inner")),
+                "regex":       compiled,
+            })
+
+    def _lookup(self, token: str) -> str:
+        if token in self.exact:
+            return self.exact[token]
+        word = self.words.get(token.lower())
+        if word is not None:
+            return word
+        if token[-2:].lower() == "'s":
+            return self._lookup(token[:-2]) + token[-2:]
+        return token
+
+    def normalize(self, text: str) -> str:
+        return self._regex.sub(self._replace, text)
+
+    def _replace(self, m: re.Match) -> str:
+        name = m.lastgroup
+        if name == "token":
+            return self._lookup(m.group())
+
+        rule = self.patterns[int(name[1:])]
+        # Re-match with the rule's own regex so \1 refers to its own groups
+        own = rule["regex"].match(m.string, m.start())
+        out = own.expand(rule["replace"]) if own else m.group()
+        if rule["inner"] and len(out) < len(m.group()):
+            out = self.normalize(out)
+        return out
+
+
+def load_packs(paths: str) -> list[dict]:
+    packs = []
+    for path in filter(None, (p.strip() for p in paths.split(","))):
+        with open(path, "r", encoding="utf-8") as f:
+            packs.append(json.load(f))
+    return packs
+
+
+normalizer = Normalizer([DEFAULT_RULES, *load_packs(NORMALIZE_RULES)])
+
+
+def normalize(text: str) -> str:
+    return normalizer.normalize(text)
@@ -0,0 +1,93 @@
+import asyncio
+import threading
+import time
+from dataclasses import dataclass, field
+
+from services.job_store import job_store
+from services.metrics import stage_seconds
+
+
+@dataclass
+class Stage:
+    name:   str
+    label:  str                      # shown as the job's "step" while this stage runs
+    fn:     object                   # async fn(results: dict, report) -> result
+    deps:   list[str] = field(default_factory=list)
+    weight: float = 1.0              # share of overall progress
+
+
+class Pipeline:
+    """
+    Runs a job's stages as a small DAG: every stage starts as soon as the
+    stages it depends on have finished, so independent work overlaps.
+
+    Each stage gets a `report(fraction, **fields)` callback (safe to call from
+    worker threads). Per-stage state is stored on the job as `stages`, and the
+    weighted sum drives the job's overall `progress` (0–99; "done" sets 100).
+    A finished stage also records how long it ran as `seconds`.
+    """
+
+    def __init__(self, job_id: str, stages: list[Stage]):
+        self.job_id  = job_id
+        self.stages  = stages
+        self.results: dict = {}
+        self._state  = {s.name: {"status": "pending", "progress": 0.0} for s in stages}
+        self._lock   = threading.Lock()
+        self._started: dict[str, float] = {}
+
+    def _publish(self, **fields):
+        total   = sum(s.weight for s in self.stages)
+        overall = sum(s.weight * self._state[s.name]["progress"] for s in self.stages) / total
+        running = [s for s in self.stages if self._state[s.name]["status"] == "running"]
+        if running:
+            fields["step"] = running[-1].label
+        job_store.update(
+            self.job_id,
+            progress=int(overall * 99),
+            stages={k: dict(v) for k, v in self._state.items()},
+            **fields,
+        )
+
+    def timings(self) -> dict:
+        """Seconds per finished stage."""
+        with self._lock:
+            return {k: v["seconds"] for k, v in self._state.items() if "seconds" in v}
+
+    def _reporter(self, stage: Stage):
+        def report(fraction: float, **fields):
+            with self._lock:
+                self._state[stage.name]["progress"] = max(0.0, min(1.0, fraction))
+                self._publish(**fields)
+        return report
+
+    def _set_status(self, stage: Stage, status: str):
+        with self._lock:
+            self._state[stage.name]["status"] = status
+            if status == "running":
+                self._started[stage.name] = time.monotonic()
+            elif status == "done":
+                self._state[stage.name]["progress"] = 1.0
+                self._state[stage.name]["seconds"] = round(time.monotonic() - self._started[stage.name], 3)
+                stage_seconds.observe(self._state[stage.name]["seconds"], stage=stage.name)
+            self._publish()
+
+    async def run(self) -> dict:
+        tasks: dict[str, asyncio.Task] = {}
+
+        async def run_stage(stage: Stage):
+            if stage.deps:
+                await asyncio.gather(*(tasks[d] for d in stage.deps))
+            self._set_status(stage, "running")
+            self.results[stage.name] = await stage.fn(self.results, self._reporter(stage))
+            self._set_status(stage, "done")
+
+        for stage in self.stages:
+            tasks[stage.name] = asyncio.create_task(run_stage(stage))
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for t in tasks.values():
+                t.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+        return self.results
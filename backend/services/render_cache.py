@@ -0,0 +1,43 @@
+import hashlib
+import json
+import os
+
+from services import asset_cache, renditions
+from services.job_store import job_store
+
+# Bump whenever the composite's encode arguments change, so old renders stop matching
+RENDER_SETTINGS_VERSION = 1
+
+
+def asset_version(video: dict) -> str:
+    """
+    Version of a background as far as we know it right now: the cached ETag /
+    Last-Modified version for remote clips (the URL until first fetched), the
+    path + size + mtime signature for local files.
+    """
+    url = video.get("url")
+    if url:
+        entry = asset_cache.cache.get(asset_cache.url_key(url), count=False)
+        return entry["version"] if entry and entry.get("version") else url
+    path = video.get("file_path", "")
+    try:
+        return renditions.source_signature(path)
+    except OSError:
+        return path
+
+
+def render_key(text: str, asset: str, voice_id: str, **settings) -> str:
+    """Content address of one render: normalized narration text, background version, voice, encode settings."""
+    raw = json.dumps(
+        [" ".join(text.split()), asset, voice_id, RENDER_SETTINGS_VERSION, sorted(settings.items())],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:40]
+
+
+def find(key: str, output_dir: str) -> dict | None:
+    """A finished job whose output still exists, else a queued / running one, for `key`."""
+    job = job_store.find_by_render_key(key)
+    if job and job["status"] == "done" and not os.path.exists(os.path.join(output_dir, job["output"] or "")):
+        return None
+    return job
@@ -0,0 +1,204 @@
+import asyncio
+import hashlib
+import json
+import os
+import subprocess
+import threading
+
+from services.scheduler import scheduler
+from services.storage import storage, touch
+
+# ── Canonical background rendition ────────────────────────────────────────────
+# Every background is transcoded once into this shape so compositing can
+# stream-copy the video track instead of scaling / cropping it on every job.
+RENDITIONS_DIR = os.getenv("RENDITIONS_DIR", "videos/renditions")
+RENDITION_W    = 720
+RENDITION_H    = 1280
+RENDITION_FPS  = 30
+RENDITION_GOP  = 60   # one keyframe every 2s, no scene-cut keyframes
+# Transcodes at once in this process (0 = a quarter of the CPU count); the rest wait their turn
+RENDITION_CONCURRENCY = int(os.getenv("RENDITION_CONCURRENCY", "0")) or max(1, (os.cpu_count() or 2) // 4)
+
+INDEX_PATH = os.path.join(RENDITIONS_DIR, "index.json")
+os.makedirs(RENDITIONS_DIR, exist_ok=True)
+
+_index_lock = threading.Lock()
+_index: dict | None = None   # index.json as last read or written by this process
+_inflight: dict[str, asyncio.Task] = {}
+_slots = asyncio.Semaphore(RENDITION_CONCURRENCY)
+
+
+def source_signature(source_path: str) -> str:
+    """Identify a source file by path, size and mtime — changes whenever the file does."""
+    st  = os.stat(source_path)
+    raw = f"{os.path.abspath(source_path)}:{st.st_size}:{st.st_mtime_ns}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:24]
+
+
+def rendition_path(signature: str) -> str:
+    return os.path.join(RENDITIONS_DIR, f"{signature}_{RENDITION_W}x{RENDITION_H}.mp4")
+
+
+def lookup(source_path: str) -> str | None:
+    """Return the canonical rendition for `source_path` if it has been ingested."""
+    try:
+        path = rendition_path(source_signature(source_path))
+    except OSError:
+        return None
+    if not os.path.exists(path):
+        return None
+    touch(path)   # in use, so quota eviction passes it over
+    return path
+
+
+def _load_index() -> dict:
+    try:
+        with open(INDEX_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_index(index: dict):
+    global _index
+    tmp = f"{INDEX_PATH}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=2)
+    os.replace(tmp, INDEX_PATH)
+    _index = index
+
+
+def _record(video_id: str, entry: dict):
+    # Re-read before writing so entries recorded by other processes are kept (and picked up here)
+    with _index_lock:
+        index = _load_index()
+        index[video_id] = entry
+        _write_index(index)
+
+
+def _current_index() -> dict:
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = _load_index()
+    return _index
+
+
+def get_record(video_id: str) -> dict | None:
+    """Rendition metadata recorded for a library / uploaded video id, from memory."""
+    entry = _current_index().get(video_id)
+    if entry and os.path.exists(entry["path"]):
+        return entry
+    return None
+
+
+def prune() -> int:
+    """
+    Forget renditions that can't be used any more — their source was deleted or
+    has changed since (so its signature no longer matches), or the file itself
+    was evicted — and delete the files no remaining entry points at.
+    Returns bytes freed. Blocking; the storage manager runs it every sweep,
+    which also picks up entries other processes recorded.
+    """
+    global _index
+    freed = 0
+    with _index_lock:
+        index = _load_index()
+        live  = {}
+        for video_id, entry in index.items():
+            try:
+                current = source_signature(entry["source"])
+            except OSError:
+                current = None
+            if current == entry["signature"] and os.path.exists(entry["path"]):
+                live[video_id] = entry
+        if len(live) == len(index):
+            _index = index
+            return 0
+        for path in {e["path"] for e in index.values()} - {e["path"] for e in live.values()}:
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+                freed += size
+            except OSError:
+                pass
+        _write_index(live)
+    return freed
+
+
+def ingest(source_path: str, video_id: str | None = None) -> str:
+    """Transcode `source_path` into the canonical rendition (blocking). Returns its path."""
+    signature = source_signature(source_path)
+    dest      = rendition_path(signature)
+
+    if not os.path.exists(dest):
+        tmp = f"{dest}.{os.getpid()}.{threading.get_ident()}.tmp.mp4"
+        try:
+            with scheduler.counted():
+                subprocess.run(
+                    [
+                        "ffmpeg", "-y", "-v", "error",
+                        "-i", source_path,
+                        "-vf", (
+                            f"scale=w={RENDITION_W}:h={RENDITION_H}:force_original_aspect_ratio=increase,"
+                            f"crop={RENDITION_W}:{RENDITION_H},fps={RENDITION_FPS}"
+                        ),
+                        "-an",
+                        "-c:v", "libx264", "-preset", "medium", "-crf", "23",
+                        "-pix_fmt", "yuv420p",
+                        "-g", str(RENDITION_GOP),
+                        "-keyint_min", str(RENDITION_GOP),
+                        "-sc_threshold", "0",
+                        "-movflags", "+faststart",
+                        tmp,
+                    ],
+                    timeout=3600,
+                    check=True,
+                )
+            os.replace(tmp, dest)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    if video_id:
+        _record(video_id, {
+            "path":      dest,
+            "source":    source_path,
+            "signature": signature,
+            "width":     RENDITION_W,
+            "height":    RENDITION_H,
+            "fps":       RENDITION_FPS,
+            "gop":       RENDITION_GOP,
+        })
+    return dest
+
+
+async def _ingest_when_free(source_path: str, video_id: str | None) -> str:
+    # Waits here rather than in a worker thread, so queued ingests don't hold the default executor
+    async with _slots:
+        return await asyncio.to_thread(ingest, source_path, video_id)
+
+
+async def ingest_async(source_path: str, video_id: str | None = None) -> str:
+    """
+    Run `ingest` off the event loop, at most RENDITION_CONCURRENCY at a time;
+    concurrent calls for the same source share one transcode.
+    """
+    signature = source_signature(source_path)
+    task = _inflight.get(signature)
+    if task is None:
+        task = asyncio.create_task(_ingest_when_free(source_path, video_id))
+        _inflight[signature] = task
+        task.add_done_callback(lambda t: (_inflight.pop(signature, None), t.cancelled() or t.exception()))
+    return await asyncio.shield(task)
+
+
+def schedule(source_path: str, video_id: str | None = None) -> asyncio.Task:
+    """Start a background ingest. A failure just leaves jobs on the scale/crop path."""
+    task = asyncio.ensure_future(ingest_async(source_path, video_id))
+    task.add_done_callback(lambda t: t.cancelled() or t.exception())
+    return task
+
+
+storage.cleaners.append(prune)
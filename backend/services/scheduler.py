@@ -0,0 +1,243 @@
+import asyncio
+import logging
+import os
+import socket
+import subprocess
+import threading
+import uuid
+from contextlib import contextmanager
+
+from services.job_store import job_store, JOB_TTL_S
+
+# ── Config ────────────────────────────────────────────────────────────────────
+# Each render runs its own ffmpeg; more workers than this just makes every job slower.
+GENERATION_WORKERS   = int(os.getenv("GENERATION_WORKERS", "0")) or max(1, (os.cpu_count() or 2) // 2)
+GENERATION_QUEUE_MAX = int(os.getenv("GENERATION_QUEUE_MAX", "100"))
+HEARTBEAT_S          = 5.0    # running jobs are marked alive this often
+STALE_AFTER_S        = 30.0   # a "processing" job without a heartbeat this long is requeued
+POLL_S               = 1.0    # how often idle workers look for jobs queued by other processes
+
+log = logging.getLogger(__name__)
+
+
+class QueueFull(Exception):
+    pass
+
+
+class JobScheduler:
+    """
+    Runs generation jobs from the job store on a fixed pool of asyncio workers.
+
+    The queue lives in the store, so every uvicorn process claims from the same
+    one (higher priority first, FIFO within a priority). Subprocesses started
+    through `run_process` are tracked per job so `cancel` can terminate a
+    running ffmpeg instead of leaving it to finish unobserved; ones run outside
+    a job (ingests, espeak, uncached stitches) are only counted, via `counted`.
+    """
+
+    def __init__(self, workers: int, max_queue: int):
+        self.workers   = workers
+        self.max_queue = max_queue
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.runner    = None   # async fn(job_id, payload), set by routes.generate
+        self._running: dict[str, asyncio.Task] = {}
+        self._procs: dict[str, set[subprocess.Popen]] = {}
+        self._procs_lock = threading.Lock()
+        self._untracked  = 0
+        self._wake    = None
+        self._tasks: list[asyncio.Task] = []
+
+    # ── Lifecycle ────────────────────────────────────────────────────────────
+    def start(self):
+        if self._tasks:
+            return
+        self._wake  = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._maintenance()))
+
+    async def stop(self):
+        for job_id in list(self._running):
+            await self._cancel_local(job_id)
+        for t in self._tasks:
+            t.cancel()
+        self._tasks = []
+
+    async def _worker(self):
+        while True:
+            try:
+                job = job_store.claim_next(self.worker_id)
+            except Exception:
+                # e.g. "database is locked" — a store hiccup mustn't shrink the pool
+                log.exception("Claiming the next job failed; retrying")
+                await asyncio.sleep(POLL_S)
+                continue
+            if job is None:
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=POLL_S)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            job_id = job["job_id"]
+            try:
+                task = asyncio.create_task(self.runner(job_id, job_store.get_payload(job_id)))
+                self._running[job_id] = task
+                await task
+            except asyncio.CancelledError:
+                if asyncio.current_task().cancelling():
+                    raise   # the worker itself is being stopped
+            except Exception as e:
+                try:
+                    job_store.update(job_id, status="error", error=str(e))
+                except Exception:
+                    log.exception("Could not record the failure of job %s", job_id)
+            finally:
+                self._running.pop(job_id, None)
+
+    async def _maintenance(self):
+        """Heartbeat our jobs, requeue orphans of dead workers, expire old jobs, honour remote cancels."""
+        while True:
+            try:
+                running = list(self._running)
+                job_store.heartbeat(self.worker_id, running)
+                if job_store.requeue_stale(STALE_AFTER_S):
+                    self._wake.set()
+                job_store.expire(JOB_TTL_S)
+
+                # DELETE may have landed on another process — it removes the row
+                for job_id in running:
+                    if job_store.get(job_id) is None:
+                        await self._cancel_local(job_id)
+            except Exception:
+                log.exception("Scheduler maintenance failed; retrying")   # next beat tries again
+
+            await asyncio.sleep(HEARTBEAT_S)
+
+    # ── Queue ────────────────────────────────────────────────────────────────
+    def submit(self, job_id: str, payload: dict, priority: int = 0, **fields) -> int:
+        """Queue a job. Returns its queue position (0 = next up)."""
+        self.start()
+        if job_store.count("queued") >= self.max_queue:
+            raise QueueFull()
+        job_store.create(job_id, payload, priority=priority, **fields)
+        self._wake.set()
+        return job_store.position(job_id)
+
+    def position(self, job_id: str) -> int | None:
+        """How many queued jobs run before `job_id`, or None if it is not queued."""
+        return job_store.position(job_id)
+
+    def depth(self) -> int:
+        return job_store.count("queued")
+
+    def active(self) -> int:
+        return len(self._running)
+
+    async def cancel(self, job_id: str) -> bool:
+        """Remove a job from the store, killing it first if it runs in this process."""
+        await self._cancel_local(job_id)
+        return job_store.delete(job_id)
+
+    async def _cancel_local(self, job_id: str):
+        task = self._running.get(job_id)
+        if task is None:
+            return
+        await asyncio.to_thread(self.kill_processes, job_id)
+        task.cancel()
+        try:
+            await task
+        except BaseException:
+            pass
+
+    # ── Subprocesses ─────────────────────────────────────────────────────────
+    def run_process(self, job_id: str, args: list[str], timeout: float, on_line=None, feed=None, **kwargs):
+        """
+        `subprocess.run(..., check=True)` that `cancel(job_id)` can terminate. Blocking.
+        With `on_line`, stdout is read line by line and handed to it as the process runs.
+        With `feed`, `feed(write)` runs in a thread writing bytes to stdin, which is
+        closed when it returns; if it raises, the process is killed and the error re-raised here.
+        """
+        if on_line:
+            kwargs.update(stdout=subprocess.PIPE)
+        if feed:
+            kwargs.update(stdin=subprocess.PIPE)
+        proc      = subprocess.Popen(args, **kwargs)
+        timed_out = threading.Event()
+        feed_error: list[BaseException] = []
+
+        def pump():
+            try:
+                feed(proc.stdin.write)
+            except BrokenPipeError:
+                pass   # the process stopped reading: killed, or it failed on its own
+            except BaseException as e:
+                feed_error.append(e)
+                proc.kill()
+            finally:
+                try:
+                    proc.stdin.close()
+                except OSError:
+                    pass
+
+        feeder = threading.Thread(target=pump, daemon=True) if feed else None
+
+        def on_timeout():
+            timed_out.set()
+            proc.kill()
+
+        timer = threading.Timer(timeout, on_timeout)
+        with self._procs_lock:
+            self._procs.setdefault(job_id, set()).add(proc)
+        timer.start()
+        if feeder:
+            feeder.start()
+        try:
+            if on_line:
+                for line in proc.stdout:
+                    on_line(line.decode("utf-8", "replace").rstrip("\r\n"))
+            proc.wait()
+            if feeder:
+                feeder.join()
+        finally:
+            timer.cancel()
+            with self._procs_lock:
+                procs = self._procs.get(job_id, set())
+                procs.discard(proc)
+                if not procs:
+                    self._procs.pop(job_id, None)
+        if timed_out.is_set():
+            raise subprocess.TimeoutExpired(args, timeout)
+        if feed_error:
+            raise feed_error[0]
+        if proc.returncode != 0:
+            raise subprocess.CalledProcessError(proc.returncode, args)
+
+    def kill_processes(self, job_id: str):
+        with self._procs_lock:
+            procs = list(self._procs.get(job_id, ()))
+        for proc in procs:
+            proc.terminate()
+        for proc in procs:
+            try:
+                proc.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+    @contextmanager
+    def counted(self):
+        """Count a subprocess run outside `run_process` in `process_count` while the block runs."""
+        with self._procs_lock:
+            self._untracked += 1
+        try:
+            yield
+        finally:
+            with self._procs_lock:
+                self._untracked -= 1
+
+    def process_count(self) -> int:
+        with self._procs_lock:
+            return self._untracked + sum(len(p) for p in self._procs.values())
+
+
+scheduler = JobScheduler(GENERATION_WORKERS, GENERATION_QUEUE_MAX)
@@ -0,0 +1,241 @@
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import shutil
+import time
+from dataclasses import dataclass, field
+
+# ── Config ────────────────────────────────────────────────────────────────────
+STORAGE_SWEEP_S   = int(os.getenv("STORAGE_SWEEP_S", "600"))     # how often quotas are enforced
+STORAGE_PROTECT_S = int(os.getenv("STORAGE_PROTECT_S", "900"))   # anything used this recently is kept
+ORPHAN_AGE_S      = int(os.getenv("ORPHAN_AGE_S", "3600"))       # temp files untouched this long are dead
+TOUCH_EVERY_S     = 60   # don't rewrite a file's atime more often than this
+
+log = logging.getLogger(__name__)
+
+_SHARD    = re.compile(r"[0-9a-f]{2}")
+_TEMPFILE = re.compile(r"(^\.(?!git)|\.tmp($|\.)|\.part$|_bg\.mp4$|_audio\.mp3$)")
+
+
+@dataclass
+class Area:
+    root:      str
+    quota_mb:  int
+    max_age_h: int = 0                               # 0 = evict on quota only
+    exclude:   list[str] = field(default_factory=list)   # top-level names managed elsewhere
+
+
+def shard_path(root: str, key: str, filename: str | None = None) -> str:
+    """
+    `root/ab/filename`, where `ab` comes from a hash of `key`, so no directory
+    grows past a few hundred entries. Everything belonging to one key (a job's
+    MP4 and its HLS folder, say) lands in the same shard.
+    """
+    shard = hashlib.sha1(key.encode("utf-8")).hexdigest()[:2]
+    return os.path.join(root, shard, filename or key)
+
+
+def touch(path: str):
+    """Record that `path` was just read (polled, streamed, downloaded) so eviction passes it over."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return
+    now = time.time()
+    if now - st.st_atime > TOUCH_EVERY_S:
+        try:
+            os.utime(path, (now, st.st_mtime))
+        except OSError:
+            pass
+
+
+def _size(path: str) -> int:
+    if not os.path.isdir(path):
+        return os.path.getsize(path)
+    total = 0
+    for dirpath, _dirs, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(dirpath, name))
+            except OSError:
+                pass
+    return total
+
+
+def _last_used(path: str) -> float:
+    """Latest read or write. For folders that's their newest file (listing a folder bumps its own atime)."""
+    st   = os.stat(path)
+    last = st.st_mtime if os.path.isdir(path) else max(st.st_atime, st.st_mtime)
+    if os.path.isdir(path):
+        for dirpath, _dirs, files in os.walk(path):
+            for name in files:
+                try:
+                    fst  = os.stat(os.path.join(dirpath, name))
+                    last = max(last, fst.st_atime, fst.st_mtime)
+                except OSError:
+                    pass
+    return last
+
+
+def _delete(path: str):
+    if os.path.isdir(path):
+        shutil.rmtree(path, ignore_errors=True)
+    else:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class StorageManager:
+    """
+    Keeps output/, uploads/, videos/ and the renditions within per-directory quotas.
+
+    Files are grouped per key (`{key}.mp4` and a `{key}/` folder are one item)
+    and evicted oldest-first — past `max_age_h`, then least recently used until
+    the area fits its quota. Nothing used within STORAGE_PROTECT_S is touched,
+    and `protectors` — fn() -> paths, registered by the routes — keep files
+    that queued / running jobs or the video library still need. `cleaners` —
+    fn() -> bytes freed, registered by the services that own the files — run
+    first, to drop what is known to be dead whatever its age.
+    """
+
+    def __init__(self, areas: list[Area], temp_roots: list[str]):
+        self.areas       = areas
+        self.temp_roots  = temp_roots
+        self.protectors: list = []
+        self.cleaners:   list = []
+        self.stats       = {"evictions": 0, "evicted_bytes": 0, "orphans_removed": 0}
+
+    # ── Items ────────────────────────────────────────────────────────────────
+    def _items(self, area: Area) -> list[list[str]]:
+        """Evictable units of an area: paths grouped by key within each directory."""
+        groups: dict[tuple, list[str]] = {}
+
+        def add(parent: str, name: str):
+            if _TEMPFILE.search(name):
+                return
+            groups.setdefault((parent, name.split(".", 1)[0]), []).append(os.path.join(parent, name))
+
+        for name in os.listdir(area.root):
+            path = os.path.join(area.root, name)
+            if name in area.exclude:
+                continue
+            if _SHARD.fullmatch(name) and os.path.isdir(path):
+                for child in os.listdir(path):
+                    add(path, child)
+            else:
+                add(area.root, name)   # files from before sharding
+        return list(groups.values())
+
+    def _protected(self) -> set[str]:
+        return {os.path.abspath(p) for fn in self.protectors for p in fn()}
+
+    @staticmethod
+    def _busy(paths: list[str], now: float, protected: set[str]) -> bool:
+        return any(
+            os.path.abspath(p) in protected or now - _last_used(p) < STORAGE_PROTECT_S
+            for p in paths
+        )
+
+    # ── Enforcement ──────────────────────────────────────────────────────────
+    def enforce(self, area: Area) -> int:
+        """Evict from one area until it is within quota and age limits. Returns bytes freed. Blocking."""
+        if not os.path.isdir(area.root):
+            return 0
+        now, items = time.time(), []
+        protected  = self._protected()
+        for paths in self._items(area):
+            try:
+                items.append((max(_last_used(p) for p in paths), sum(_size(p) for p in paths), paths))
+            except OSError:
+                continue   # deleted underneath us
+
+        total  = sum(size for _, size, _ in items)
+        quota  = area.quota_mb * 1024 * 1024
+        cutoff = now - area.max_age_h * 3600 if area.max_age_h else None
+        freed  = 0
+        for last_used, size, paths in sorted(items, key=lambda i: i[0]):
+            expired = cutoff is not None and last_used < cutoff
+            if total <= quota and not expired:
+                break
+            if self._busy(paths, now, protected):
+                continue
+            for p in paths:
+                _delete(p)
+            total -= size
+            freed += size
+            self.stats["evictions"]     += 1
+            self.stats["evicted_bytes"] += size
+        return freed
+
+    def enforce_all(self) -> int:
+        freed = 0
+        for clean in self.cleaners:
+            size   = clean()
+            freed += size
+            self.stats["evicted_bytes"] += size
+        return freed + sum(self.enforce(a) for a in self.areas)
+
+    def sweep_orphans(self) -> int:
+        """
+        Remove temp files left by crashed jobs and uploads (partial downloads,
+        `.tmp` / `.part` scratch files, legacy `_bg.mp4` / `_audio.mp3`).
+        Only files untouched for ORPHAN_AGE_S go, so other live processes keep theirs.
+        """
+        cutoff  = time.time() - ORPHAN_AGE_S
+        removed = 0
+        for root in self.temp_roots:
+            for dirpath, dirs, files in os.walk(root):
+                for name in files + dirs:
+                    path = os.path.join(dirpath, name)
+                    try:
+                        if _TEMPFILE.search(name) and os.stat(path).st_mtime < cutoff:
+                            _delete(path)
+                            removed += 1
+                    except OSError:
+                        pass
+        self.stats["orphans_removed"] += removed
+        return removed
+
+    def usage(self) -> dict:
+        out = {}
+        for area in self.areas:
+            items = self._items(area) if os.path.isdir(area.root) else []
+            size  = sum(_size(p) for paths in items for p in paths if os.path.exists(p))
+            out[area.root] = {
+                "items":    len(items),
+                "size_mb":  round(size / (1024 * 1024), 2),
+                "quota_mb": area.quota_mb,
+            }
+        return out
+
+    async def run(self):
+        """Sweep orphans once at startup, then enforce quotas every STORAGE_SWEEP_S."""
+        await asyncio.to_thread(self.sweep_orphans)
+        while True:
+            try:
+                await asyncio.to_thread(self.enforce_all)
+            except Exception:
+                log.exception("Storage sweep failed")   # a bad file shouldn't stop future sweeps
+            await asyncio.sleep(STORAGE_SWEEP_S)
+
+
+storage = StorageManager(
+    areas=[
+        Area("output",  int(os.getenv("OUTPUT_QUOTA_MB", "20000")),  int(os.getenv("OUTPUT_MAX_AGE_H", "72"))),
+        Area("uploads", int(os.getenv("UPLOADS_QUOTA_MB", "500")),   int(os.getenv("UPLOADS_MAX_AGE_H", "168"))),
+        Area("videos",  int(os.getenv("VIDEOS_QUOTA_MB", "10000")),  int(os.getenv("VIDEOS_MAX_AGE_H", "0")),
+             exclude=["renditions"]),
+        Area(os.getenv("RENDITIONS_DIR", "videos/renditions"),
+             int(os.getenv("RENDITIONS_QUOTA_MB", "5000")), int(os.getenv("RENDITIONS_MAX_AGE_H", "0")),
+             exclude=["index.json"]),
+    ],
+    temp_roots=[
+        "output", "uploads", "videos",
+        os.getenv("ASSET_CACHE_DIR", "cache/assets"),
+        os.getenv("TTS_CACHE_DIR", "cache/tts"),
+    ],
+)
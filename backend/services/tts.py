@@ -0,0 +1,324 @@
+import os
+import re
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from services import tts_cache
+from services.scheduler import scheduler
+from services.tts_providers import Provider, TTSProviderError, VOICES, chain, get, primary
+
+# ── Config ────────────────────────────────────────────────────────────────────
+TTS_CHUNK_CHARS   = int(os.getenv("TTS_CHUNK_CHARS", "2500"))   # well under the provider's per-request cap
+TTS_CONCURRENCY   = int(os.getenv("TTS_CONCURRENCY", "3"))      # chunks in flight per story
+TTS_CHUNK_RETRIES = int(os.getenv("TTS_CHUNK_RETRIES", "3"))
+TTS_JOIN_PAUSE_S  = 0.25    # uniform pause left between stitched chunks
+# A preview narrates only about its own length of speech, and the full render
+# promoted from it cuts its first chunk at the same place to reuse it. Counted
+# at a brisk rate, whatever the provider, so the opening rarely runs short.
+OPENING_WPM       = 180
+OPENING_WORDS     = int(os.getenv("PREVIEW_SECONDS", "15")) * OPENING_WPM // 60
+SILENCE_DB        = "-50dB"
+
+_SENTENCE_END = re.compile(r"(?<=[.!?…])\s+|(?<=[.!?…][\"')\]])\s+")
+_BREAK        = re.compile(rf"\n\s*\n|{_SENTENCE_END.pattern}")
+
+
+def split_opening(text: str, words: int = OPENING_WORDS, max_chars: int = TTS_CHUNK_CHARS) -> tuple[str, str]:
+    """
+    Split `text` after the first sentence (or paragraph) end that completes at
+    least `words` words. Returns (opening, rest); rest is "" when the story
+    is no longer than that, and opening is "" when no break fits `max_chars`.
+    """
+    for m in _BREAK.finditer(text):
+        if m.start() > max_chars:
+            break
+        if len(text[:m.start()].split()) >= words:
+            return text[:m.start()].strip(), text[m.end():].strip()
+    if len(text) <= max_chars:
+        return text.strip(), ""
+    return "", text
+
+
+def split_text(text: str, max_chars: int = TTS_CHUNK_CHARS, opening_words: int = 0) -> list[str]:
+    """
+    Split a story into chunks of at most `max_chars`, breaking between
+    paragraphs where possible, then between sentences, then between words.
+    With `opening_words`, the first chunk ends at the `split_opening` break
+    instead — the same text `narrate_opening` synthesizes for previews.
+    """
+    chunks, current = [], ""
+    if opening_words:
+        opening, text = split_opening(text, opening_words, max_chars)
+        if opening:
+            chunks.append(opening)
+
+    def flush():
+        nonlocal current
+        if current.strip():
+            chunks.append(current.strip())
+        current = ""
+
+    def add(piece: str, sep: str):
+        nonlocal current
+        if current and len(current) + len(sep) + len(piece) > max_chars:
+            flush()
+        current = f"{current}{sep}{piece}" if current else piece
+
+    for para in re.split(r"\n\s*\n", text):
+        para = para.strip()
+        if not para:
+            continue
+        if len(para) <= max_chars:
+            add(para, "\n\n")
+            continue
+        for sentence in _SENTENCE_END.split(para):
+            if len(sentence) <= max_chars:
+                add(sentence, " ")
+                continue
+            for word in sentence.split():
+                add(word, " ")
+        flush()   # a long paragraph never shares a chunk with the next one
+    flush()
+    return chunks
+
+
+def _synthesize_chunk(provider: Provider, text: str, voice: str, on_bytes=None) -> dict:
+    """
+    Synthesize one chunk through the cache, retrying just this chunk on failure.
+    `on_bytes` also gets the audio as the provider sends it (or from the cache
+    on a hit); once any has been handed over, a failure is no longer retried.
+    """
+    key  = chunk_key(text, voice, provider)
+    sent = False
+
+    def produce(tmp_path: str):
+        nonlocal sent
+        with open(tmp_path, "wb") as f:
+            for chunk in provider.audio(text, voice):
+                if chunk:
+                    f.write(chunk)
+                    if on_bytes:
+                        sent = True
+                        on_bytes(chunk)
+
+    attempt = 0
+    while True:
+        try:
+            entry = tts_cache.get_or_create(key, ".mp3", produce)
+            break
+        except Exception as e:
+            if sent and on_bytes:
+                raise   # part of it is already out; let the caller decide
+            wait = provider.retry_after(e, attempt)
+            attempt += 1
+            if wait is None or attempt >= TTS_CHUNK_RETRIES:
+                raise TTSProviderError(provider.name, e, transient=wait is not None) from e
+            time.sleep(wait)
+    if on_bytes and not sent:
+        _forward(entry["path"], on_bytes)
+    return entry
+
+
+def _forward(path: str, write, block: int = 64 * 1024):
+    """Hand a cached audio file to `write`, keeping it from being evicted meanwhile."""
+    tts_cache.cache.acquire(path)
+    try:
+        with open(path, "rb") as f:
+            while data := f.read(block):
+                write(data)
+    finally:
+        tts_cache.cache.release(path)
+
+
+def _with_fallback(providers: list[Provider], attempt):
+    """
+    Run `attempt(provider)` on each provider in turn until one succeeds. A
+    provider that fails transiently is skipped by later jobs for TTS_COOLDOWN_S;
+    any other failure (auth, config) fails the job instead of falling back.
+    Returns (result, provider).
+    """
+    for i, provider in enumerate(providers):
+        try:
+            return attempt(provider), provider
+        except TTSProviderError as e:
+            if not e.transient:
+                raise
+            provider.mark_down()
+            if i == len(providers) - 1:
+                raise
+
+
+def _stitch(paths: list[str], out_path: str, job_id: str | None):
+    """
+    Concatenate chunk audio in order into FLAC (lossless), trimming the silence
+    each chunk carries at the joins and leaving a uniform pause instead.
+    """
+    inputs, filters = [], []
+    last = len(paths) - 1
+    for i, path in enumerate(paths):
+        inputs += ["-i", path]
+        chain = []
+        if i > 0:
+            chain.append(f"silenceremove=start_periods=1:start_threshold={SILENCE_DB}")
+        if i < last:
+            chain += [
+                "areverse",
+                f"silenceremove=start_periods=1:start_threshold={SILENCE_DB}",
+                "areverse",
+                f"apad=pad_dur={TTS_JOIN_PAUSE_S}",
+            ]
+        filters.append(f"[{i}:a]{','.join(chain) or 'anull'}[a{i}]")
+    concat = "".join(f"[a{i}]" for i in range(len(paths)))
+    filters.append(f"{concat}concat=n={len(paths)}:v=0:a=1[out]")
+
+    args = [
+        "ffmpeg", "-y", "-v", "error",
+        *inputs,
+        "-filter_complex", ";".join(filters),
+        "-map", "[out]",
+        "-c:a", "flac",
+        "-f", "flac",
+        out_path,
+    ]
+    if job_id:
+        scheduler.run_process(job_id, args, timeout=600)
+    else:
+        with scheduler.counted():
+            subprocess.run(args, timeout=600, check=True)
+
+
+def voice_name(voice: str) -> str:
+    return voice if voice in VOICES else "male"
+
+
+def chunk_key(text: str, voice: str, provider: Provider | None = None) -> str:
+    provider = provider or primary()
+    return tts_cache.key_for(text, provider.voice_id(voice), provider.model_id, provider.output_format)
+
+
+def story_key(text: str, voice: str, provider: Provider | None = None) -> str:
+    return chunk_key(text, voice, provider)
+
+
+def voice_tag(voice: str, provider: str | None = None, preview: bool = False) -> str:
+    """Which provider and voice a render's narration comes from (the configured one by default), for render keys."""
+    p = get(provider) if provider else primary(preview)
+    return f"{p.name}:{p.voice_id(voice)}"
+
+
+def estimate_seconds(text: str, preview: bool = False) -> float:
+    """Roughly how long narration of `text` runs, from its word count at the provider's speaking rate."""
+    return len(text.split()) / primary(preview).wpm * 60
+
+
+def narrate(text: str, voice: str, job_id: str | None = None, on_progress=None, opening: bool = False) -> dict:
+    """
+    Return the cache entry holding narration for `text`, plus the `provider`
+    that spoke it. Blocking.
+
+    Short stories are one request. Long ones are split into chunks that are
+    synthesized concurrently (each cached on its own), then stitched in order.
+    `on_progress(done, total)` is called as chunks finish. If the provider
+    fails, the whole story is narrated by the fallback instead. With
+    `opening` (a render promoted from a preview) the first chunk is the
+    preview's, already cached.
+    """
+    chunks = split_text(text, opening_words=OPENING_WORDS if opening else 0)
+
+    def attempt(provider: Provider) -> dict:
+        if len(chunks) <= 1:
+            entry = _synthesize_chunk(provider, text, voice)
+            if on_progress:
+                on_progress(1, 1)
+            return entry
+
+        def stitch(tmp_path: str):
+            done, lock = [0], threading.Lock()
+
+            def synthesize(chunk: str) -> dict:
+                entry = _synthesize_chunk(provider, chunk, voice)
+                with lock:
+                    done[0] += 1
+                    if on_progress:
+                        on_progress(done[0], len(chunks))
+                return entry
+
+            with ThreadPoolExecutor(max_workers=TTS_CONCURRENCY) as pool:
+                parts = list(pool.map(synthesize, chunks))
+
+            # Keep the chunk files from being evicted while ffmpeg reads them
+            for p in parts:
+                tts_cache.cache.acquire(p["path"])
+            try:
+                _stitch([p["path"] for p in parts], tmp_path, job_id)
+            finally:
+                for p in parts:
+                    tts_cache.cache.release(p["path"])
+
+        return tts_cache.get_or_create(story_key(text, voice, provider), ".flac", stitch)
+
+    entry, provider = _with_fallback(chain(), attempt)
+    return {**entry, "provider": provider.name}
+
+
+def stream(text: str, voice: str, write, on_progress=None, opening: bool = False) -> str:
+    """
+    Synthesize `text`, handing its MP3 bytes to `write` in story order as
+    they arrive. Blocking; returns the name of the provider that spoke it.
+
+    The first chunk is forwarded straight from the provider's response while
+    the rest are synthesized ahead in the background. Every chunk is cached
+    as `narrate` caches it, but the joins are not silence-trimmed. Falling
+    back to another provider is only possible before any audio went out.
+    `opening` splits as `narrate` does.
+    """
+    chunks  = split_text(text, opening_words=OPENING_WORDS if opening else 0)
+    parts   = chunks if len(chunks) > 1 else [text]
+    written = False
+
+    def forward(data: bytes):
+        nonlocal written
+        written = True
+        write(data)
+
+    def attempt(provider: Provider):
+        with ThreadPoolExecutor(max_workers=max(1, TTS_CONCURRENCY - 1)) as pool:
+            ahead = [pool.submit(_synthesize_chunk, provider, chunk, voice) for chunk in parts[1:]]
+            try:
+                _synthesize_chunk(provider, parts[0], voice, on_bytes=forward)
+                if on_progress:
+                    on_progress(1, len(parts))
+                for done, future in enumerate(ahead, start=2):
+                    _forward(future.result()["path"], forward)
+                    if on_progress:
+                        on_progress(done, len(parts))
+            except TTSProviderError as e:
+                for future in ahead:
+                    future.cancel()
+                if written:
+                    raise RuntimeError(f"Narration failed part-way through: {e}") from e
+                raise
+            except BaseException:
+                for future in ahead:
+                    future.cancel()
+                raise
+
+    _, provider = _with_fallback(chain(), attempt)
+    return provider.name
+
+
+def narrate_opening(text: str, voice: str) -> dict:
+    """
+    Narration for just the opening of `text` — about PREVIEW_SECONDS of
+    sentences (`split_opening`) — for previews (by TTS_PREVIEW_PROVIDER
+    when set). Blocking.
+
+    It is cached exactly as `narrate(..., opening=True)` caches its first
+    chunk, so promoting the preview synthesizes only the rest of the story.
+    """
+    chunks  = split_text(text, opening_words=OPENING_WORDS)
+    opening = text if len(chunks) <= 1 else chunks[0]
+    entry, provider = _with_fallback(chain(preview=True), lambda p: _synthesize_chunk(p, opening, voice))
+    return {**entry, "provider": provider.name}
@@ -0,0 +1,65 @@
+import hashlib
+import json
+import os
+import threading
+
+from services.disk_cache import DiskCache
+
+# ── Config ────────────────────────────────────────────────────────────────────
+TTS_CACHE_DIR    = os.getenv("TTS_CACHE_DIR", "cache/tts")
+TTS_CACHE_MAX_MB = int(os.getenv("TTS_CACHE_MAX_MB", "2000"))
+
+cache = DiskCache(TTS_CACHE_DIR, TTS_CACHE_MAX_MB * 1024 * 1024)
+
+_key_locks: dict[str, threading.Lock] = {}
+_key_locks_guard = threading.Lock()
+
+
+def key_for(text: str, voice_id: str, model_id: str, output_format: str) -> str:
+    """Deterministic cache key for one synthesis request (text is the normalized TTS input)."""
+    raw = json.dumps([text.strip(), voice_id, model_id, output_format], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:40]
+
+
+def lookup(key: str) -> dict | None:
+    return cache.get(key)
+
+
+def get_or_create(key: str, ext: str, produce) -> dict:
+    """
+    Return the cached audio for `key`, calling `produce(tmp_path)` to synthesize it on a miss.
+    Threads asking for the same key at once wait for the first one instead of paying twice.
+    """
+    with _key_locks_guard:
+        lock = _key_locks.setdefault(key, threading.Lock())
+    with lock:
+        entry = cache.get(key, count=False)
+        if entry:
+            return entry
+        tmp = cache.tmp_path(key)
+        try:
+            produce(tmp)
+            return cache.put(key, tmp, f"{key}{ext}")
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            with _key_locks_guard:
+                _key_locks.pop(key, None)
+
+
+def pin(key: str, pinned: bool = True) -> dict | None:
+    """Pinned entries are never evicted (e.g. narration reused across many renders)."""
+    return cache.pin(key, pinned)
+
+
+def stats() -> dict:
+    entries = cache.entries()
+    lookups = cache.stats["hits"] + cache.stats["misses"]
+    return {
+        **cache.stats,
+        "hit_ratio": round(cache.stats["hits"] / lookups, 3) if lookups else None,
+        "entries":   len(entries),
+        "pinned":    sum(1 for e in entries if e.get("pinned")),
+        "size_mb":   round(sum(e["size"] for e in entries) / (1024 * 1024), 2),
+        "max_mb":    TTS_CACHE_MAX_MB,
+    }
@@ -0,0 +1,292 @@
+import importlib.util
+import logging
+import os
+import random
+import shutil
+import subprocess
+import threading
+import time
+
+from services.scheduler import scheduler
+
+# ── Config ────────────────────────────────────────────────────────────────────
+TTS_PROVIDER         = os.getenv("TTS_PROVIDER", "elevenlabs")
+TTS_FALLBACK         = os.getenv("TTS_FALLBACK", "espeak")       # used when the provider fails; "" = none
+TTS_PREVIEW_PROVIDER = os.getenv("TTS_PREVIEW_PROVIDER", "")     # e.g. "espeak" for free, instant drafts
+TTS_TIMEOUT_S        = int(os.getenv("TTS_TIMEOUT_S", "60"))
+TTS_COOLDOWN_S       = int(os.getenv("TTS_COOLDOWN_S", "60"))    # a failed provider is skipped this long
+TTS_MAX_BACKOFF_S    = 30
+ESPEAK_WPM           = int(os.getenv("ESPEAK_WPM", "175"))
+
+VOICES = ("male", "female")
+
+log = logging.getLogger(__name__)
+
+
+class TTSProviderError(Exception):
+    """
+    A provider failed for good: retries ran out (`transient` — an outage, worth
+    falling back from), or retrying can't fix the error (bad key, bad voice,
+    package not installed — a config problem the fallback would only hide).
+    """
+
+    def __init__(self, provider: str, cause: Exception, transient: bool = True):
+        super().__init__(f"{provider} TTS failed: {cause}")
+        self.provider  = provider
+        self.transient = transient
+
+
+class Provider:
+    """
+    One TTS backend. A single instance per provider is shared by the whole
+    process: it holds the pooled client, and `slots` caps how many requests
+    are in flight at once (<NAME>_MAX_CONCURRENCY) across every job.
+    All providers produce MP3, so caching, stitching and streaming don't care which one ran.
+    """
+
+    name          = ""
+    model_id      = ""   # with output_format, part of the TTS cache key
+    output_format = ""
+    voices: dict[str, str] = {}
+    default_concurrency = 4
+    wpm      = 150  # typical speaking rate, for estimating how long narration runs
+    requires = ""   # Python package the provider imports, checked by `installed`
+
+    def __init__(self):
+        limit = int(os.getenv(f"{self.name.upper()}_MAX_CONCURRENCY", str(self.default_concurrency)))
+        self.slots        = threading.BoundedSemaphore(max(1, limit))
+        self.down_until   = 0.0
+        self._client      = None
+        self._client_lock = threading.Lock()
+
+    def client(self):
+        with self._client_lock:
+            if self._client is None:
+                self._client = self._make_client()
+            return self._client
+
+    def _make_client(self):
+        return None
+
+    def voice_id(self, voice: str) -> str:
+        return self.voices.get(voice, self.voices["male"])
+
+    def installed(self) -> bool:
+        try:
+            return not self.requires or importlib.util.find_spec(self.requires) is not None
+        except ModuleNotFoundError:   # a missing parent package ("google")
+            return False
+
+    def cooling_down(self) -> bool:
+        return time.time() < self.down_until
+
+    def mark_down(self):
+        self.down_until = time.time() + TTS_COOLDOWN_S
+
+    def audio(self, text: str, voice: str):
+        """MP3 bytes for `text`, yielded as they arrive. Holds one of the provider's slots until exhausted."""
+        with self.slots:
+            yield from self._synthesize(text, self.voice_id(voice))
+
+    def _synthesize(self, text: str, voice_id: str):
+        raise NotImplementedError
+
+    def retry_after(self, exc: Exception, attempt: int) -> float | None:
+        """
+        Seconds to wait before retrying after `exc`, or None if retrying can't help.
+        Rate limits honor Retry-After; other transient failures back off exponentially.
+        """
+        if isinstance(exc, (ImportError, NotImplementedError)):
+            return None
+        response = getattr(exc, "response", None)
+        if response is None:
+            response = getattr(exc, "rsp", None)   # gTTS
+        status   = getattr(exc, "status_code", None) or getattr(response, "status_code", None)
+        if status is None and isinstance(getattr(exc, "code", None), int):
+            status = exc.code   # google.api_core errors carry the HTTP status here
+        if status is not None and 400 <= status < 500 and status not in (408, 429):
+            return None   # bad key, bad voice, text too long — the same request fails again
+
+        headers = getattr(exc, "headers", None) or getattr(response, "headers", None) or {}
+        try:
+            return min(TTS_MAX_BACKOFF_S, float(headers.get("retry-after") or headers.get("Retry-After")))
+        except (AttributeError, TypeError, ValueError):
+            pass
+        return min(TTS_MAX_BACKOFF_S, 2 ** attempt + random.random())
+
+
+class ElevenLabsProvider(Provider):
+    name          = "elevenlabs"
+    model_id      = "eleven_multilingual_v2"
+    output_format = "mp3_44100_128"
+    requires      = "elevenlabs"
+    voices = {
+        "male":   "pNInz6obpgDQGcFmaJgB",  # Adam
+        "female": "21m00Tcm4TlvDq8ikWAM",  # Rachel
+    }
+
+    def _make_client(self):
+        from elevenlabs.client import ElevenLabs
+        return ElevenLabs(api_key=os.getenv("ELEVENLABS_API_KEY"), timeout=TTS_TIMEOUT_S)
+
+    def _synthesize(self, text: str, voice_id: str):
+        return self.client().text_to_speech.convert(
+            voice_id=voice_id,
+            text=text,
+            model_id=self.model_id,
+            output_format=self.output_format,
+        )
+
+
+class GTTSProvider(Provider):
+    """Google Translate's free voice. One voice per accent, so "female" only changes the accent."""
+
+    name          = "gtts"
+    model_id      = "gtts"
+    output_format = "mp3_24000_32"
+    requires      = "gtts"
+    voices = {"male": "com", "female": "co.uk"}
+    default_concurrency = 2
+
+    def _synthesize(self, text: str, voice_id: str):
+        from gtts import gTTS
+        return gTTS(text=text, lang="en", tld=voice_id, timeout=TTS_TIMEOUT_S).stream()
+
+
+class GoogleCloudProvider(Provider):
+    name          = "google_cloud"
+    model_id      = "google_neural2"
+    output_format = "mp3_24000"
+    requires      = "google.cloud.texttospeech"
+    voices = {"male": "en-US-Neural2-D", "female": "en-US-Neural2-F"}
+    default_concurrency = 8
+
+    def _make_client(self):
+        from google.cloud import texttospeech
+        return texttospeech.TextToSpeechClient()
+
+    def _synthesize(self, text: str, voice_id: str):
+        from google.cloud import texttospeech
+        response = self.client().synthesize_speech(
+            input=texttospeech.SynthesisInput(text=text),
+            voice=texttospeech.VoiceSelectionParams(language_code="en-US", name=voice_id),
+            audio_config=texttospeech.AudioConfig(audio_encoding=texttospeech.AudioEncoding.MP3),
+            timeout=TTS_TIMEOUT_S,
+        )
+        yield response.audio_content
+
+
+class EspeakProvider(Provider):
+    """
+    Local espeak-ng, encoded to MP3 by ffmpeg as it speaks. Runs on the CPU
+    with no network or key: robotic, but near-instant — for drafts and as the
+    fallback when the remote provider is down.
+    """
+
+    name          = "espeak"
+    model_id      = "espeak-ng"
+    output_format = "mp3_22050_64"
+    voices = {"male": "en-us+m3", "female": "en-us+f3"}
+    default_concurrency = os.cpu_count() or 2
+    wpm = ESPEAK_WPM
+
+    def installed(self) -> bool:
+        return shutil.which("espeak-ng") is not None and shutil.which("ffmpeg") is not None
+
+    def _synthesize(self, text: str, voice_id: str):
+        with scheduler.counted():   # its ffmpeg shows up in the process gauge
+            yield from self._speak(text, voice_id)
+
+    def _speak(self, text: str, voice_id: str):
+        speak = subprocess.Popen(
+            ["espeak-ng", "--stdout", "-v", voice_id, "-s", str(ESPEAK_WPM), "--stdin"],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+        )
+        encode = subprocess.Popen(
+            [
+                "ffmpeg", "-v", "error",
+                "-f", "wav", "-i", "pipe:0",
+                "-ac", "1", "-ar", "22050",
+                "-c:a", "libmp3lame", "-b:a", "64k",
+                "-f", "mp3", "pipe:1",
+            ],
+            stdin=speak.stdout, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+        )
+        speak.stdout.close()   # ffmpeg owns the read end now
+
+        def write_text():
+            try:
+                speak.stdin.write(text.encode("utf-8"))
+                speak.stdin.close()
+            except OSError:
+                pass   # espeak-ng died; its exit status says so below
+
+        writer = threading.Thread(target=write_text, daemon=True)
+        writer.start()
+        try:
+            while data := encode.stdout.read(16 * 1024):
+                yield data
+            if encode.wait(timeout=TTS_TIMEOUT_S) or speak.wait(timeout=TTS_TIMEOUT_S):
+                raise RuntimeError("espeak-ng could not synthesize this text.")
+        finally:
+            for proc in (speak, encode):
+                if proc.poll() is None:
+                    proc.kill()
+                    proc.wait()
+
+    def retry_after(self, exc: Exception, attempt: int) -> float | None:
+        return None   # local and deterministic
+
+
+PROVIDERS = {
+    cls.name: cls for cls in (ElevenLabsProvider, GTTSProvider, GoogleCloudProvider, EspeakProvider)
+}
+
+_instances: dict[str, Provider] = {}
+_instances_lock = threading.Lock()
+
+
+def get(name: str) -> Provider:
+    """The process-wide instance of provider `name`."""
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown TTS provider {name!r}; choose from {', '.join(PROVIDERS)}.")
+    with _instances_lock:
+        if name not in _instances:
+            _instances[name] = PROVIDERS[name]()
+        return _instances[name]
+
+
+def primary(preview: bool = False) -> Provider:
+    return get((preview and TTS_PREVIEW_PROVIDER) or TTS_PROVIDER)
+
+
+def chain(preview: bool = False) -> list[Provider]:
+    """
+    Providers to try in order: the configured one, then the fallback. Ones
+    cooling down go last. A configured provider that isn't installed stays in,
+    so jobs fail on it rather than quietly narrating with the fallback.
+    """
+    providers = [primary(preview)]
+    if TTS_FALLBACK and get(TTS_FALLBACK) is not providers[0] and get(TTS_FALLBACK).installed():
+        providers.append(get(TTS_FALLBACK))
+    return sorted(providers, key=lambda p: p.cooling_down())
+
+
+def check_config():
+    """
+    Validate the TTS settings at startup: an unknown provider name raises
+    (the app won't start), a configured provider that isn't installed is
+    logged — jobs would otherwise only find out on their first narration.
+    """
+    settings = {
+        "TTS_PROVIDER":         TTS_PROVIDER,
+        "TTS_FALLBACK":         TTS_FALLBACK,
+        "TTS_PREVIEW_PROVIDER": TTS_PREVIEW_PROVIDER,
+    }
+    for setting, name in settings.items():
+        if not name:
+            continue
+        provider = get(name)
+        if not provider.installed():
+            missing = provider.requires or "espeak-ng / ffmpeg"
+            log.error("%s=%s, but %s is not installed; narration will fail over or error.", setting, name, missing)
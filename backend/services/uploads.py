@@ -0,0 +1,191 @@
+import hashlib
+import os
+import uuid
+
+import aiofiles
+
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+from services.storage import shard_path
+
+# ── Config ────────────────────────────────────────────────────────────────────
+HEADER_BYTES       = 8 * 1024    # gathered before `check_header` judges the file
+MULTIPART_OVERHEAD = 64 * 1024   # boundaries, part headers and small fields around the file
+
+# Upload endpoints read the raw request, so describe the form for the OpenAPI docs
+UPLOAD_FORM_DOC = {
+    "requestBody": {
+        "required": True,
+        "content": {"multipart/form-data": {"schema": {
+            "type": "object",
+            "required": ["file"],
+            "properties": {"file": {"type": "string", "format": "binary"}},
+        }}},
+    },
+}
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+class InvalidUpload(Exception):
+    pass
+
+
+def check_video_header(head: bytes):
+    """Reject anything that isn't an MP4/MOV (ISO BMFF box) or WebM (EBML) container."""
+    if head[:4] == b"\x1a\x45\xdf\xa3":
+        return
+    if len(head) >= 8 and head[4:8] in (b"ftyp", b"moov", b"mdat", b"wide", b"free", b"skip", b"pnot"):
+        return
+    raise InvalidUpload("File is not a valid .mp4, .mov, or .webm video.")
+
+
+class _Parts:
+    """Collects MultipartParser callbacks as ("part", disposition) / ("data", bytes) / ("end", None) events."""
+
+    def __init__(self):
+        self.events: list[tuple] = []
+        self._headers: dict[bytes, bytes] = {}
+        self._field = self._value = b""
+
+    def on_part_begin(self):
+        self._headers = {}
+
+    def on_header_field(self, data: bytes, start: int, end: int):
+        self._field += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int):
+        self._value += data[start:end]
+
+    def on_header_end(self):
+        self._headers[self._field.lower()] = self._value
+        self._field = self._value = b""
+
+    def on_headers_finished(self):
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        self.events.append(("part", options))
+
+    def on_part_data(self, data: bytes, start: int, end: int):
+        self.events.append(("data", bytes(data[start:end])))
+
+    def on_part_end(self):
+        self.events.append(("end", None))
+
+    def callbacks(self) -> dict:
+        names = ("on_part_begin", "on_header_field", "on_header_value", "on_header_end",
+                 "on_headers_finished", "on_part_data", "on_part_end")
+        return {name: getattr(self, name) for name in names}
+
+    def drain(self) -> list[tuple]:
+        events, self.events = self.events, []
+        return events
+
+
+async def receive_upload(
+    request,
+    dest_dir: str,
+    max_bytes: int,
+    check_filename,
+    check_header=None,
+    on_chunk=None,
+    field: str = "file",
+) -> dict:
+    """
+    Stream the `field` file of a multipart request to `dest_dir` while the
+    body is still arriving — the form is parsed from `request.stream()`, not
+    spooled first, so nothing is held in memory or written twice.
+
+    A Content-Length over the limit is refused before any of the body is read.
+    `check_filename(name)` runs as soon as the part's headers arrive,
+    `check_header(first_bytes)` before any data is written — either raises
+    InvalidUpload to refuse the file — and the size limit as bytes come in;
+    a bad or oversized upload is cut off right there.
+    `on_chunk(data)` sees every chunk (e.g. to decode text incrementally).
+    Files are stored under their content hash (in a shard subdirectory), so
+    uploading the same bytes twice keeps one copy.
+
+    Returns {path, sha256, size, duplicate, filename}.
+    """
+    declared = request.headers.get("content-length", "")
+    if declared.isdigit() and int(declared) > max_bytes + MULTIPART_OVERHEAD:
+        raise UploadTooLarge()
+    content_type, options = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or not options.get(b"boundary"):
+        raise InvalidUpload("Expected a multipart/form-data upload.")
+
+    os.makedirs(dest_dir, exist_ok=True)
+    tmp      = os.path.join(dest_dir, f".upload-{uuid.uuid4().hex}.part")
+    parts    = _Parts()
+    parser   = MultipartParser(options[b"boundary"], parts.callbacks())
+    digest   = hashlib.sha256()
+    out      = None
+    filename = None
+    in_file  = False
+    head     = b""
+    size     = 0
+    received = 0
+
+    async def accept(data: bytes):
+        nonlocal size
+        size += len(data)
+        if size > max_bytes:
+            raise UploadTooLarge()
+        digest.update(data)
+        if on_chunk:
+            on_chunk(data)
+        await out.write(data)
+
+    async def handle(kind: str, value):
+        nonlocal out, filename, in_file, head
+        if kind == "part":
+            in_file = filename is None and value.get(b"name") == field.encode() and b"filename" in value
+            if in_file:
+                filename = value[b"filename"].decode("utf-8", "replace")
+                check_filename(filename)
+                out = await aiofiles.open(tmp, "wb")
+        elif kind == "data" and in_file:
+            if check_header and head is not None:
+                head += value
+                if len(head) < HEADER_BYTES:
+                    return
+                check_header(head)
+                value, head = head, None
+            await accept(value)
+        elif kind == "end" and in_file:
+            in_file = False
+            if check_header and head is not None:
+                check_header(head)
+                if head:
+                    await accept(head)
+                head = None
+
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > max_bytes + MULTIPART_OVERHEAD:
+                raise UploadTooLarge()   # no (or a wrong) Content-Length
+            parser.write(chunk)
+            for event in parts.drain():
+                await handle(*event)
+        parser.finalize()
+        for event in parts.drain():
+            await handle(*event)
+        if filename is None:
+            raise InvalidUpload("No file was uploaded.")
+        await out.close()
+        out = None
+
+        sha       = digest.hexdigest()
+        path      = shard_path(dest_dir, sha[:16], f"{sha[:16]}{os.path.splitext(filename)[1].lower()}")
+        duplicate = os.path.exists(path)
+        if not duplicate:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp, path)
+        return {"path": path, "sha256": sha, "size": size, "duplicate": duplicate, "filename": filename}
+    finally:
+        if out is not None:
+            await out.close()
+        if os.path.exists(tmp):
+            os.remove(tmp)
@@ -0,0 +1,17 @@
+import os
+import sys
+import tempfile
+
+# Tests import the app the way uvicorn does: from the backend directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Stores and caches opened at import time go to a scratch directory, not the working tree
+_scratch = tempfile.mkdtemp(prefix="storyscroll-tests-")
+for _name, _path in (
+    ("JOB_STORE_PATH",  "jobs.db"),
+    ("CATALOG_PATH",    "catalog.db"),
+    ("TTS_CACHE_DIR",   "cache/tts"),
+    ("ASSET_CACHE_DIR", "cache/assets"),
+    ("RENDITIONS_DIR",  "renditions"),
+):
+    os.environ.setdefault(_name, os.path.join(_scratch, _path))
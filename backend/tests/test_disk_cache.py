@@ -0,0 +1,77 @@
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from services.disk_cache import DiskCache, fcntl
+
+
+def put(cache: DiskCache, key: str, size: int = 100) -> dict:
+    src = cache.tmp_path(key)
+    with open(src, "wb") as f:
+        f.write(b"x" * size)
+    return cache.put(key, src, f"{key}.bin")
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return DiskCache(str(tmp_path), max_bytes=250)
+
+
+def test_hits_and_misses(cache):
+    assert cache.get("a") is None
+    put(cache, "a")
+    assert cache.get("a")["size"] == 100
+    assert cache.stats == {"hits": 1, "misses": 1, "evictions": 0}
+
+
+def test_evicts_least_recently_used(cache):
+    put(cache, "a")
+    time.sleep(0.01)
+    put(cache, "b")
+    time.sleep(0.01)
+    cache.get("a")
+    time.sleep(0.01)
+    put(cache, "c")
+    assert cache.get("b", count=False) is None
+    assert cache.get("a", count=False) and cache.get("c", count=False)
+    assert cache.stats["evictions"] == 1
+
+
+def test_pinned_and_checked_out_entries_stay(cache):
+    put(cache, "a")
+    cache.pin("a")
+    b = put(cache, "b")
+    cache.acquire(b["path"])
+    put(cache, "c")
+    put(cache, "d")
+    assert cache.get("a", count=False) and cache.get("b", count=False)
+    cache.release(b["path"])
+    put(cache, "e")
+    assert cache.get("b", count=False) is None
+
+
+@pytest.mark.skipif(fcntl is None, reason="needs flock")
+def test_checkout_in_another_process_is_respected(cache):
+    a = put(cache, "a")
+    holder = subprocess.Popen(
+        [sys.executable, "-c", (
+            "import fcntl, os, sys, time\n"
+            f"fd = os.open({a['path']!r}, os.O_RDONLY)\n"
+            "fcntl.flock(fd, fcntl.LOCK_SH)\n"
+            "print('locked', flush=True)\n"
+            "sys.stdin.read()\n"
+        )],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True,
+    )
+    try:
+        assert holder.stdout.readline().strip() == "locked"
+        put(cache, "b")
+        put(cache, "c")
+        assert os.path.exists(a["path"])
+    finally:
+        holder.communicate("")
+    put(cache, "d")
+    assert not os.path.exists(a["path"])
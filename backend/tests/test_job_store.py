@@ -0,0 +1,101 @@
+import threading
+import time
+
+import pytest
+
+from services.job_store import JobStore, SQLiteJobStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SQLiteJobStore(str(tmp_path / "jobs.db"))
+
+
+def test_claims_by_priority_then_age(store):
+    store.create("old", {})
+    time.sleep(0.01)
+    store.create("new", {})
+    store.create("urgent", {}, priority=5)
+    claimed = [store.claim_next("w")["job_id"] for _ in range(3)]
+    assert claimed == ["urgent", "old", "new"]
+    assert store.claim_next("w") is None
+    assert store.get("old")["status"] == "processing"
+
+
+def test_concurrent_workers_never_share_a_job(store):
+    for i in range(40):
+        store.create(f"job{i}", {})
+    claimed, lock = [], threading.Lock()
+
+    def worker(name: str):
+        while job := store.claim_next(name):
+            with lock:
+                claimed.append(job["job_id"])
+
+    threads = [threading.Thread(target=worker, args=(f"w{i}",)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(claimed) == sorted(f"job{i}" for i in range(40))
+
+
+def test_requeues_jobs_whose_worker_stopped_beating(store):
+    store.create("alive", {})
+    store.create("dead", {})
+    store.claim_next("w1")
+    store.claim_next("w2")
+    store._conn().execute("UPDATE jobs SET heartbeat = ?", (time.time() - 120,))
+    store.heartbeat("w1", ["alive"])
+
+    assert store.requeue_stale(60) == ["dead"]
+    assert store.get("dead")["status"] == "queued"
+    assert store.get("alive")["status"] == "processing"
+    assert store.claim_next("w3")["job_id"] == "dead"
+
+
+def test_expires_only_old_finished_jobs(store):
+    for job_id in ("old", "recent", "running"):
+        store.create(job_id, {})
+    store.update("old", status="done", finished=time.time() - 100)
+    store.update("recent", status="error")
+    store.update("running", status="processing")
+
+    assert store.expire(50) == ["old"]
+    assert store.get("old") is None
+    assert store.get("recent") and store.get("running")
+
+
+def test_update_merges_extra_fields(store):
+    store.create("j", {"story": {}}, render_key="k")
+    store.update("j", progress=40, eta=12)
+    store.update("j", tts_provider="espeak")
+    job = store.get("j")
+    assert (job["progress"], job["eta"], job["tts_provider"]) == (40, 12, "espeak")
+    assert store.find_by_render_key("k")["job_id"] == "j"
+
+
+def test_concurrent_increments_are_not_lost(store):
+    store.create("j", {})
+
+    def attach():
+        for _ in range(25):
+            store.increment("j", "attached")
+
+    threads = [threading.Thread(target=attach) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert store.get("j")["attached"] == 101
+    assert store.increment("j", "attached", -1) == 100
+    assert store.increment("gone", "attached") is None
+
+
+def test_backends_must_implement_the_interface():
+    class Partial(JobStore):
+        def get(self, job_id):
+            return None
+
+    with pytest.raises(TypeError):
+        Partial()
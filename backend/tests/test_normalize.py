@@ -0,0 +1,57 @@
+import pytest
+
+from services.normalize import Normalizer, normalize
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("TIFU by being late", "Today I fucked up by being late"),
+    ("aita for this?", "Am I the asshole for this?"),
+    ("NTA. **YTA**", "Not the asshole. You're the asshole"),
+    ("TL;DR: w/ my bf", "Too long, didn't read: with my boyfriend"),
+    ("my MIL's house", "my mother-in-law's house"),
+    ("my SO and I", "my significant other and I"),
+    ("her SO's car", "her significant other's car"),
+    ("you're the AH here", "you're the asshole here"),
+    ("I (27F) and my ex [31m]", "I (27 year old female) and my ex [31 year old male]"),
+    ("(M 40) here", "(male, 40) here"),
+    ("bc I said so", "because I said so"),
+    ("AITA/WIBTA for this", "Am I the asshole/Would I be the asshole for this"),
+    ("left w/o him b/c rn I can't", "left without him because right now I can't"),
+    ("TW: my FIL", "Trigger warning: my father-in-law"),
+    ("[link](https://example.com) and https://redd.it/x", "link and a link"),
+    ("see r/AmItheAsshole", "see r slash AmItheAsshole"),
+    ("# Title\n> quoted", "Title\nquoted"),
+])
+def test_expands(text, expected):
+    assert normalize(text) == expected
+
+
+@pytest.mark.parametrize("text", [
+    "I was SO mad",
+    "it was 95F outside",
+    "I waited 15m",
+    "I watched F1",
+    "My M16 rifle",
+    "400 BC",
+    "AH!",
+    "I'm 25 and ran 5 m",
+    "so what, nah",
+    "I am an RN at the hospital",
+    "He makes 2 mil a year",
+    "my cw and tw accounts",
+])
+def test_leaves_ordinary_text_alone(text):
+    assert normalize(text) == text
+
+
+def test_rule_packs_layer_and_validate():
+    engine = Normalizer([
+        {"words": {"NTA": "not the a-hole"}},
+        {"words": {"NTA": "nope"}, "patterns": [{"pattern": r"\bcolour\b", "replace": "color"}]},
+    ])
+    assert engine.normalize("NTA, nice colour") == "nope, nice color"
+
+    with pytest.raises(ValueError):
+        Normalizer([{"words": {"two words": "x"}}])
+    with pytest.raises(ValueError):
+        Normalizer([{"patterns": [{"pattern": r"x*"}]}])
@@ -0,0 +1,196 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+from fastapi import HTTPException
+
+from routes import reddit
+
+
+class StandIn:
+    """A local Reddit: serves listing JSON, records every request, and can be told to lag or refuse."""
+
+    def __init__(self):
+        self.requests: list[tuple[str, dict]] = []
+        self.delay    = 0.0
+        self.status   = 200
+        self.headers: dict[str, str] = {}
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url    = urlparse(self.path)
+                params = {k: v[0] for k, v in parse_qs(url.query).items()}
+                stand_in.requests.append((url.path, params))
+                time.sleep(stand_in.delay)
+                body = json.dumps(stand_in.listing(url.path.split("/")[2], params)).encode()
+                self.send_response(stand_in.status)
+                for name, value in stand_in.headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url    = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+
+    @staticmethod
+    def listing(sub: str, params: dict) -> dict:
+        start = int(params.get("after", "t3_0")[3:])
+        posts = [
+            {"data": {
+                "id": f"{sub}{n}", "title": f"{sub} story {n}", "selftext": f"{sub} {n} " + "words " * 40,
+                "subreddit": sub, "ups": n, "created_utc": time.time(), "permalink": f"/r/{sub}/{n}",
+            }}
+            for n in range(start, start + int(params.get("limit", 5)))
+        ]
+        return {"data": {"children": posts, "after": f"t3_{start + len(posts)}"}}
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    stand_in = StandIn()
+    monkeypatch.setattr(reddit, "REDDIT_BASE", stand_in.url)
+    monkeypatch.setattr(reddit, "_rate_limited_until", 0.0)
+    reddit._cache.clear()
+    reddit._inflight.clear()
+    yield stand_in
+    stand_in.server.shutdown()
+
+
+def run(scenario):
+    """Run a scenario on a fresh loop with a fresh pooled client."""
+    async def wrapped():
+        reddit._client = None
+        try:
+            return await scenario()
+        finally:
+            await reddit.close_client()
+    return asyncio.run(wrapped())
+
+
+def test_second_request_is_served_from_cache(upstream):
+    async def scenario():
+        first  = await reddit.get_listing("tifu", "hot", 5)
+        second = await reddit.get_listing("tifu", "hot", 5)
+        return first, second
+
+    (payload, status), (cached, cached_status) = run(scenario)
+    assert (status, cached_status) == ("miss", "hit")
+    assert cached == payload and payload["count"] == 5
+    assert upstream.requests == [("/r/tifu/hot.json", {"limit": "5", "raw_json": "1"})]
+
+
+def test_stale_entry_is_served_while_one_refresh_runs(upstream, monkeypatch):
+    monkeypatch.setattr(reddit, "REDDIT_CACHE_TTL_S", 0)
+
+    async def scenario():
+        await reddit.get_listing("tifu", "new", 5)
+        statuses = [(await reddit.get_listing("tifu", "new", 5))[1] for _ in range(3)]
+        await asyncio.gather(*reddit._inflight.values())
+        return statuses
+
+    assert run(scenario) == ["stale"] * 3
+    assert len(upstream.requests) == 2
+
+
+def test_concurrent_misses_share_one_upstream_call(upstream):
+    upstream.delay = 0.2
+
+    async def scenario():
+        return await asyncio.gather(*(reddit.get_listing("tifu", "top", 5) for _ in range(8)))
+
+    results = run(scenario)
+    assert {status for _, status in results} == {"miss"}
+    assert all(payload is results[0][0] for payload, _ in results)
+    assert len(upstream.requests) == 1
+
+
+def test_429_backs_off_without_calling_reddit_again(upstream):
+    async def scenario():
+        await reddit.get_listing("tifu", "hot", 5)
+        upstream.status, upstream.headers = 429, {"Retry-After": "30"}
+        with pytest.raises(HTTPException) as limited:
+            await reddit.get_listing("nosleep", "hot", 5)
+        calls = len(upstream.requests)
+        with pytest.raises(HTTPException) as again:
+            await reddit.get_listing("offmychest", "hot", 5)
+        cached = await reddit.get_listing("tifu", "hot", 5)
+        return limited.value, again.value, calls, cached
+
+    limited, again, calls, (_, cached_status) = run(scenario)
+    assert limited.status_code == again.status_code == 429
+    assert int(again.headers["Retry-After"]) > 25
+    assert len(upstream.requests) == calls == 2
+    assert cached_status == "hit"
+
+
+def test_exhausted_rate_limit_window_pauses_upstream_calls(upstream, monkeypatch):
+    upstream.headers = {"X-Ratelimit-Remaining": "0", "X-Ratelimit-Reset": "45"}
+    monkeypatch.setattr(reddit, "REDDIT_CACHE_TTL_S", 0)
+
+    async def scenario():
+        await reddit.get_listing("tifu", "hot", 5)
+        stale = await reddit.get_listing("tifu", "hot", 5)   # limited: served stale, no refresh
+        with pytest.raises(HTTPException) as limited:
+            await reddit.get_listing("nosleep", "hot", 5)
+        return stale[1], limited.value.status_code
+
+    assert run(scenario) == ("stale", 429)
+    assert len(upstream.requests) == 1
+
+
+def test_feed_pages_through_a_validated_cursor(upstream):
+    async def scenario():
+        first = await reddit.get_reddit_feed(subreddits="tifu,nosleep", sort="new", limit=4, cursor=None)
+        second = await reddit.get_reddit_feed(subreddits=None, sort="hot", limit=4, cursor=first["next_cursor"])
+        return first, second
+
+    first, second = run(scenario)
+    assert first["count"] == second["count"] == 4
+    assert second["sort"] == "new"
+    assert not {s["id"] for s in first["stories"]} & {s["id"] for s in second["stories"]}
+    assert all(params.get("after", "").startswith("t3_") for _, params in upstream.requests[2:])
+
+
+@pytest.mark.parametrize("subreddits, limit", [("tifu,nosleep", 4), ("tifu,nosleep,offmychest", 4)])
+def test_feed_pages_skip_nothing(upstream, subreddits, limit):
+    async def scenario():
+        pages, cursor = [], None
+        for _ in range(4):
+            page   = await reddit.get_reddit_feed(subreddits=subreddits, sort="new", limit=limit, cursor=cursor)
+            cursor = page["next_cursor"]
+            pages.append(page)
+        return pages
+
+    pages  = run(scenario)
+    served = [s["id"] for page in pages for s in page["stories"]]
+    assert all(page["count"] == limit for page in pages)
+    assert len(served) == len(set(served))
+    for sub in subreddits.split(","):
+        numbers = sorted(int(i[len(sub):]) for i in served if i.startswith(sub))
+        assert numbers == list(range(len(numbers)))   # every post up to the last one served
+    fetched = sum(int(params["limit"]) for _, params in upstream.requests)
+    assert fetched == len(served)
+
+
+@pytest.mark.parametrize("state", [
+    {"sort": "hot", "after": {"tifu": "t3_1&limit=100"}, "seen": []},
+    {"sort": "hot", "after": {"../admin": None}, "seen": []},
+    {"sort": "hot", "after": {f"sub{i}": None for i in range(reddit.FEED_MAX_SUBS + 1)}, "seen": []},
+    {"sort": "best", "after": {"tifu": None}, "seen": []},
+])
+def test_tampered_cursor_is_rejected(upstream, state):
+    with pytest.raises(HTTPException) as rejected:
+        reddit._decode_cursor(reddit._encode_cursor(state))
+    assert rejected.value.status_code == 400
+    assert not upstream.requests
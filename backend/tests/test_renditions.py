@@ -0,0 +1,31 @@
+import asyncio
+import threading
+import time
+
+from services import renditions
+
+
+def test_ingests_are_bounded(tmp_path, monkeypatch):
+    running, peak, lock = [0], [0], threading.Lock()
+
+    def ingest(source_path, video_id=None):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.05)
+        with lock:
+            running[0] -= 1
+        return source_path
+
+    monkeypatch.setattr(renditions, "ingest", ingest)
+    monkeypatch.setattr(renditions, "_slots", asyncio.Semaphore(2))
+    sources = []
+    for i in range(6):
+        (tmp_path / f"clip{i}.mp4").write_bytes(b"x" * (i + 1))
+        sources.append(str(tmp_path / f"clip{i}.mp4"))
+
+    async def scenario():
+        return await asyncio.gather(*(renditions.ingest_async(s) for s in sources + sources))
+
+    assert asyncio.run(scenario()) == sources + sources
+    assert peak[0] == 2
@@ -0,0 +1,20 @@
+import sys
+
+from services.scheduler import scheduler
+
+
+def test_process_count_includes_processes_run_outside_jobs():
+    before = scheduler.process_count()
+    with scheduler.counted():
+        with scheduler.counted():
+            assert scheduler.process_count() == before + 2
+    assert scheduler.process_count() == before
+
+
+def test_process_count_tracks_job_processes():
+    seen = []
+    scheduler.run_process(
+        "job", [sys.executable, "-c", "print('x')"], timeout=10,
+        on_line=lambda line: seen.append(scheduler.process_count()),
+    )
+    assert seen == [1] and scheduler.process_count() == 0
@@ -0,0 +1,37 @@
+from services.tts import split_opening, split_text
+
+SENTENCE = "This sentence has exactly eight words in it."
+
+
+def story(sentences: int, per_paragraph: int = 5) -> str:
+    paragraphs = [" ".join([SENTENCE] * per_paragraph) for _ in range(0, sentences, per_paragraph)]
+    return "\n\n".join(paragraphs)
+
+
+def test_opening_ends_at_the_first_sentence_past_the_word_count():
+    opening, rest = split_opening(story(20), words=20)
+    assert opening == " ".join([SENTENCE] * 3)
+    assert rest.startswith(SENTENCE)
+
+
+def test_first_chunk_is_the_opening():
+    text   = story(200)
+    chunks = split_text(text, max_chars=1000, opening_words=20)
+    assert chunks[0] == split_opening(text, words=20, max_chars=1000)[0]
+    assert all(len(c) <= 1000 for c in chunks)
+    assert " ".join(" ".join(chunks).split()) == " ".join(text.split())
+
+
+def test_short_story_is_one_chunk():
+    text = story(2, per_paragraph=2)
+    assert split_text(text, opening_words=20) == [text]
+
+
+def test_without_an_opening_chunks_fill_up():
+    chunks = split_text(story(200), max_chars=1000, opening_words=0)
+    assert len(chunks[0]) > 900
+
+
+def test_full_renders_dont_cut_an_opening_by_default():
+    text = story(15)   # 120 words: one request, no join
+    assert split_text(text) == [text]
@@ -0,0 +1,40 @@
+import pytest
+
+from services import tts
+from services.tts_providers import Provider, TTSProviderError
+
+
+class Fake(Provider):
+    name   = "fake"
+    voices = {"male": "m"}
+
+    def __init__(self, status: int | None = None):
+        super().__init__()
+        self.status = status
+
+    def _synthesize(self, text, voice_id):
+        if self.status:
+            raise type("APIError", (Exception,), {"status_code": self.status})(f"HTTP {self.status}")
+        yield b"ID3"
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(tts.time, "sleep", lambda s: None)
+
+
+@pytest.mark.parametrize("status", [401, 403, 422])
+def test_config_errors_fail_instead_of_falling_back(status):
+    primary, fallback = Fake(status), Fake()
+    with pytest.raises(TTSProviderError) as failed:
+        tts._with_fallback([primary, fallback], lambda p: tts._synthesize_chunk(p, f"text {status}", "male"))
+    assert not failed.value.transient
+    assert not primary.cooling_down()
+
+
+@pytest.mark.parametrize("status", [429, 503])
+def test_outages_fall_back_after_retries(status):
+    primary, fallback = Fake(status), Fake()
+    _, used = tts._with_fallback([primary, fallback], lambda p: tts._synthesize_chunk(p, f"text {status}", "male"))
+    assert used is fallback
+    assert primary.cooling_down()
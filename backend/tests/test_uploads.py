@@ -0,0 +1,71 @@
+import os
+
+import pytest
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.testclient import TestClient
+
+from services.uploads import InvalidUpload, UploadTooLarge, check_video_header, receive_upload
+
+MP4 = b"\x00\x00\x00\x18ftypmp42" + b"\x00" * 20000
+
+
+def check_filename(name: str):
+    if not name.endswith(".mp4"):
+        raise InvalidUpload("mp4 only")
+
+
+@pytest.fixture
+def client(tmp_path):
+    app   = FastAPI()
+    seen  = []
+
+    @app.post("/upload")
+    async def upload(request: Request):
+        try:
+            saved = await receive_upload(
+                request, str(tmp_path), max_bytes=64 * 1024,
+                check_filename=check_filename, check_header=check_video_header,
+                on_chunk=lambda chunk: seen.append(len(chunk)),
+            )
+        except UploadTooLarge:
+            raise HTTPException(status_code=413)
+        except InvalidUpload as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        return {**saved, "seen": sum(seen)}
+
+    return TestClient(app)
+
+
+def leftovers(path) -> list[str]:
+    return [f for f in os.listdir(path) if f.startswith(".upload-")]
+
+
+def test_stores_by_content_hash_once(client, tmp_path):
+    first  = client.post("/upload", files={"file": ("clip.mp4", MP4)}).json()
+    second = client.post("/upload", data={"title": "x"}, files={"file": ("again.mp4", MP4)}).json()
+    assert first["size"] == len(MP4) and first["seen"] == len(MP4)
+    assert first["filename"] == "clip.mp4" and not first["duplicate"]
+    assert second["duplicate"] and second["path"] == first["path"]
+    with open(first["path"], "rb") as f:
+        assert f.read() == MP4
+    assert not leftovers(tmp_path)
+
+
+@pytest.mark.parametrize("files, status", [
+    ({"file": ("clip.mp4", b"NOTAVIDEO" * 5000)}, 422),
+    ({"file": ("clip.mov", MP4)}, 422),
+    ({"other": ("clip.mp4", MP4)}, 422),
+    ({"file": ("clip.mp4", MP4 * 8)}, 413),
+])
+def test_rejects(client, tmp_path, files, status):
+    assert client.post("/upload", files=files).status_code == status
+    assert not leftovers(tmp_path)
+
+
+def test_rejects_declared_length_before_reading(client):
+    headers = {"content-type": "multipart/form-data; boundary=x", "content-length": str(10 ** 9)}
+    assert client.post("/upload", content=b"--x--", headers=headers).status_code == 413
+
+
+def test_requires_multipart(client):
+    assert client.post("/upload", json={"file": "x"}).status_code == 422
@@ -0,0 +1,21 @@
+import pytest
+
+from routes.videos import VIDEO_LIBRARY, trusted_id
+from services.storage import shard_path
+
+LIBRARY = VIDEO_LIBRARY[0]
+UPLOAD  = "0123456789abcdef"
+
+
+@pytest.mark.parametrize("video, expected", [
+    (LIBRARY, LIBRARY["id"]),
+    ({"id": LIBRARY["id"], "file_path": LIBRARY["file_path"]}, LIBRARY["id"]),
+    ({"id": UPLOAD, "file_path": shard_path("videos", UPLOAD, f"{UPLOAD}.mp4")}, UPLOAD),
+    ({"id": LIBRARY["id"], "url": "https://evil.example/clip.mp4"}, None),
+    ({"id": LIBRARY["id"], "file_path": "videos/other.mp4"}, None),
+    ({"id": UPLOAD, "file_path": "videos/other.mp4"}, None),
+    ({"id": "mine", "file_path": shard_path("videos", "mine", "mine.mp4")}, None),
+    ({"file_path": LIBRARY["file_path"]}, None),
+])
+def test_only_server_issued_ids_are_trusted(video, expected):
+    assert trusted_id(video) == expected
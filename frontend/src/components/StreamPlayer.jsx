@@ -0,0 +1,16 @@
+import { useEffect, useRef } from 'react'
+
+// Plays a (possibly still growing) HLS playlist where the browser supports HLS natively
+// (Safari / iOS, recent Chrome); elsewhere it plays `fallbackSrc`, the finished MP4
+export default function StreamPlayer({ src, fallbackSrc, style }) {
+  const videoRef = useRef(null)
+
+  useEffect(() => {
+    const el = videoRef.current
+    if (!el) return
+    const url = src && el.canPlayType('application/vnd.apple.mpegurl') ? src : fallbackSrc
+    if (url) el.src = url
+  }, [src, fallbackSrc])
+
+  return <video ref={videoRef} controls autoPlay playsInline style={style} />
+}
@@ -1,18 +1,19 @@
 import { useState, useEffect, useRef } from 'react'
 import { useLocation, useNavigate } from 'react-router-dom'
 
+// Background download and narration run at the same time on the server
 const STEPS = [
-  { id: 'tts',       label: 'Generating audio narration' },
-  { id: 'analyze',   label: 'Analyzing audio' },
-  { id: 'composite', label: 'Compositing video + audio' },
-  { id: 'done',      label: 'Done!' },
+  { id: 'background', label: 'Downloading background video' },
+  { id: 'tts',        label: 'Generating audio narration' },
+  { id: 'composite',  label: 'Compositing video + audio' },
+  { id: 'done',       label: 'Done!' },
 ]
 
 const STEP_MAP = {
-  'Generating audio narration': 0,
-  'Analyzing audio':            1,
-  'Compositing video + audio':  2,
-  'Complete':                   3,
+  'Downloading background video': 0,
+  'Generating audio narration':   1,
+  'Compositing video + audio':    2,
+  'Complete':                     3,
 }
 
 const FUN_FACTS = [
@@ -34,7 +35,9 @@ export default function Loading() {
   const [stepLabel, setStepLabel] = useState('Starting...')
   const [factIndex, setFactIndex] = useState(0)
   const [error, setError]         = useState(null)
-  const pollRef = useRef(null)
+  const [eta, setEta]             = useState(null)
+  const pollRef   = useRef(null)
+  const sourceRef = useRef(null)
 
   // Start the generation job
   useEffect(() => {
@@ -43,7 +46,8 @@ export default function Loading() {
         const res  = await fetch('/api/generate', {
           method:  'POST',
           headers: { 'Content-Type': 'application/json' },
-          body:    JSON.stringify({ story, video, voice }),
+          // HLS output lets the result page start playing while the render finishes
+          body:    JSON.stringify({ story, video, voice, output_mode: 'hls' }),
         })
         const data = await res.json()
         if (!res.ok) throw new Error(data.detail || 'Generation failed')
@@ -55,38 +59,75 @@ export default function Loading() {
     if (story && video) startJob()
   }, [])
 
-  // Poll job status once we have a job_id
+  // Follow job status once we have a job_id: server-sent events, falling back to polling
   useEffect(() => {
     if (!jobId) return
+    let finished = false
+
+    function handle(data) {
+      setProgress(data.progress)
+      setStepLabel(data.step)
+      setEta(data.eta ?? null)
+
+      if (data.stream && data.status === 'processing') {
+        // First segments are out — hand over to the player and keep rendering
+        finished = true
+        stop()
+        navigate('/result', { state: { story, video, jobId, stream: data.stream } })
+      } else if (data.status === 'done') {
+        finished = true
+        stop()
+        setProgress(100)
+        setTimeout(() => {
+          navigate('/result', { state: { story, video, jobId, stream: data.stream, output: data.output } })
+        }, 800)
+      } else if (data.status === 'error') {
+        finished = true
+        stop()
+        setError(data.error || 'An unknown error occurred.')
+      }
+    }
 
     async function poll() {
       try {
         const res  = await fetch(`/api/generate/${jobId}/status`)
         const data = await res.json()
         if (!res.ok) throw new Error(data.detail || 'Status check failed')
-
-        setProgress(data.progress)
-        setStepLabel(data.step)
-
-        if (data.status === 'done') {
-          clearInterval(pollRef.current)
-          setProgress(100)
-          setTimeout(() => {
-            navigate('/result', { state: { story, video, jobId } })
-          }, 800)
-        } else if (data.status === 'error') {
-          clearInterval(pollRef.current)
-          setError(data.error || 'An unknown error occurred.')
-        }
+        handle(data)
       } catch (e) {
-        clearInterval(pollRef.current)
+        stop()
         setError(e.message)
       }
     }
 
-    poll()
-    pollRef.current = setInterval(poll, 1000)
-    return () => clearInterval(pollRef.current)
+    function startPolling() {
+      poll()
+      pollRef.current = setInterval(poll, 1000)
+    }
+
+    function stop() {
+      sourceRef.current?.close()
+      clearInterval(pollRef.current)
+    }
+
+    if (window.EventSource) {
+      const source = new EventSource(`/api/generate/${jobId}/events`)
+      sourceRef.current = source
+      source.onmessage = (e) => handle(JSON.parse(e.data))
+      source.addEventListener('gone', () => {
+        stop()
+        setError('Job not found.')
+      })
+      source.onerror = () => {
+        // Stream dropped (proxy without SSE support, server restart) — poll instead
+        source.close()
+        if (!finished) startPolling()
+      }
+    } else {
+      startPolling()
+    }
+
+    return stop
   }, [jobId])
 
   // Cycle fun facts
@@ -152,6 +193,9 @@ export default function Loading() {
           </div>
           <span style={styles.progressLabel}>{Math.round(progress)}%</span>
         </div>
+        {eta > 0 && (
+          <p style={styles.eta}>About {Math.ceil(eta)}s left</p>
+        )}
 
         {/* Steps */}
         <div style={styles.stepList}>
@@ -243,6 +287,12 @@ const styles = {
     gap: 12,
     marginBottom: 32,
   },
+  eta: {
+    fontSize: 12,
+    color: '#6b6b6b',
+    marginTop: -16,
+    marginBottom: 24,
+  },
   progressLabel: {
     fontSize: 12,
     color: '#007acc',
@@ -1,14 +1,46 @@
+import { useState, useEffect } from 'react'
 import { useLocation, useNavigate } from 'react-router-dom'
+import StreamPlayer from '../components/StreamPlayer'
 
 export default function Result() {
   const location  = useLocation()
   const navigate  = useNavigate()
-  const { story, video, jobId } = location.state || {}
+  const { story, video, jobId, stream } = location.state || {}
 
-  const videoUrl = jobId ? `/api/video/${jobId}.mp4` : null
+  // Finished renders live in sharded folders; the job reports the path under /api/video/
+  const [output, setOutput] = useState(location.state?.output ?? null)
+  const videoUrl = output ? `/api/video/${output}` : null
+
+  // With a live stream we arrive before the render is done; the MP4 download waits for it
+  const [rendering, setRendering] = useState(Boolean(stream))
+  const [progress, setProgress]   = useState(0)
+  const [renderError, setRenderError] = useState(null)
+
+  useEffect(() => {
+    if (!rendering || !jobId) return
+    const t = setInterval(async () => {
+      try {
+        const res  = await fetch(`/api/generate/${jobId}/status`)
+        const data = await res.json()
+        if (!res.ok) throw new Error(data.detail || 'Status check failed')
+        setProgress(data.progress)
+        if (data.status === 'done') {
+          setOutput(data.output)
+          setRendering(false)
+        } else if (data.status === 'error') {
+          setRendering(false)
+          setRenderError(data.error || 'An unknown error occurred.')
+        }
+      } catch (e) {
+        setRendering(false)
+        setRenderError(e.message)
+      }
+    }, 2000)
+    return () => clearInterval(t)
+  }, [rendering, jobId])
 
   function handleDownload() {
-    if (!videoUrl) return
+    if (!videoUrl || rendering || renderError) return
     const a = document.createElement('a')
     a.href = videoUrl
     a.download = `storyscroll-${jobId}.mp4`
@@ -31,18 +63,32 @@ export default function Result() {
   return (
     <main className="page-content fade-in">
       <div style={styles.container}>
-        {/* Success banner */}
-        <div style={styles.successBanner}>
-          <svg width="20" height="20" viewBox="0 0 24 24" fill="none"
-            stroke="#4ec9b0" strokeWidth="2.5" strokeLinecap="round" strokeLinejoin="round">
-            <polyline points="20 6 9 17 4 12"/>
-          </svg>
-          <span style={{ color: '#4ec9b0', fontWeight: 600 }}>Your video is ready!</span>
-        </div>
+        {/* Status banner */}
+        {renderError ? (
+          <div style={styles.errorBanner}>
+            <span style={{ color: '#f44747', fontWeight: 600 }}>Rendering failed: {renderError}</span>
+          </div>
+        ) : rendering ? (
+          <div style={styles.renderingBanner}>
+            <span style={{ color: '#007acc', fontWeight: 600 }}>
+              Still rendering ({Math.round(progress)}%) — playback has already started
+            </span>
+          </div>
+        ) : (
+          <div style={styles.successBanner}>
+            <svg width="20" height="20" viewBox="0 0 24 24" fill="none"
+              stroke="#4ec9b0" strokeWidth="2.5" strokeLinecap="round" strokeLinejoin="round">
+              <polyline points="20 6 9 17 4 12"/>
+            </svg>
+            <span style={{ color: '#4ec9b0', fontWeight: 600 }}>Your video is ready!</span>
+          </div>
+        )}
 
         {/* Video player */}
         <div style={styles.playerWrap}>
-          {videoUrl ? (
+          {stream ? (
+            <StreamPlayer src={stream} fallbackSrc={videoUrl} style={styles.video} />
+          ) : videoUrl ? (
             <video
               src={videoUrl}
               controls
@@ -70,7 +116,7 @@ export default function Result() {
           <button
             className="btn btn-primary btn-lg"
             onClick={handleDownload}
-            disabled={!videoUrl}
+            disabled={!videoUrl || rendering || Boolean(renderError)}
           >
             <svg width="16" height="16" viewBox="0 0 24 24" fill="none"
               stroke="currentColor" strokeWidth="2" strokeLinecap="round" strokeLinejoin="round">
@@ -161,6 +207,28 @@ const styles = {
     marginBottom: 24,
     fontSize: 14,
   },
+  renderingBanner: {
+    display: 'flex',
+    alignItems: 'center',
+    gap: 10,
+    background: 'rgba(0,122,204,0.1)',
+    border: '1px solid rgba(0,122,204,0.3)',
+    borderRadius: 6,
+    padding: '10px 16px',
+    marginBottom: 24,
+    fontSize: 14,
+  },
+  errorBanner: {
+    display: 'flex',
+    alignItems: 'center',
+    gap: 10,
+    background: 'rgba(244,71,71,0.1)',
+    border: '1px solid rgba(244,71,71,0.3)',
+    borderRadius: 6,
+    padding: '10px 16px',
+    marginBottom: 24,
+    fontSize: 14,
+  },
   playerWrap: {
     background: '#000',
     borderRadius: 8,
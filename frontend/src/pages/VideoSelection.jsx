@@ -137,6 +137,12 @@ export default function VideoSelection() {
     ? library.filter((v) => v.categoryId === filterCat)
     : library
 
+  function handleSelect(video) {
+    setSelected(video)
+    // Warm the background on the server while the user is still choosing a voice
+    fetch(`/api/videos/${encodeURIComponent(video.id)}/prefetch`, { method: 'POST' }).catch(() => {})
+  }
+
   function handleUpload(f) {
     if (!f) return
     if (!f.name.match(/\.(mp4|mov|webm)$/i)) {
@@ -222,7 +228,7 @@ export default function VideoSelection() {
                   key={video.id}
                   video={video}
                   isSelected={selected?.id === video.id}
-                  onClick={() => setSelected(video)}
+                  onClick={() => handleSelect(video)}
                 />
               ))}
               {filtered.length === 0 && (